@@ -1,17 +1,30 @@
+import asyncio
 import fitz
 import os
 from agent_knowledge_base import KnowledgeBaseOperation
+from document_registry import DocumentRegistry
+from functools import partial
+from nomic_ai import embedding_executor
+from pdf_extract import PAGES_PER_TASK, default_workers, iter_pages_parallel, page_count
 from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
 from agno.tools.toolkit import Toolkit
+from agno.vectordb.pgvector import SearchType
 
 class PDFKnowledgeBase(Toolkit):  
     """Uploading the data it is extracted to text format."""
     
     def __init__(self):
         super().__init__(name="PDFKnowledgeBase")
-        self.ak_tool = KnowledgeBaseOperation()
+        # Hybrid search so exact clause numbers and defined terms are matched too.
+        self.ak_tool = KnowledgeBaseOperation(search_type=SearchType.hybrid)
+        self.registry = DocumentRegistry(
+            self.ak_tool.db_engine, schema=self.ak_tool.vector_db.schema
+        )
         self.loaded_files = set()
         self.register(self.write_and_search)
+        # Agent.arun prefers the async variant registered under the same name.
+        self.register(self.awrite_and_search, name="write_and_search")
 
     def write_and_search(self, pdf_path: str, query: str):
         """
@@ -33,17 +46,31 @@ class PDFKnowledgeBase(Toolkit):
         
         print(f"Using file_path: {pdf_path}")
         
+        # Files already in the registry are skipped, so repeat questions go straight to search.
         self.pdf_upload(pdf_path)
         results = self.search(query)  
         return "\n\n".join(results) if results else "No results found."
 
+    async def awrite_and_search(self, pdf_path: str, query: str):
+        """
+        Extracts the content of a pdf and then search it based on the query provided.
+        Args:
+            pdf_path (str): the path to the pdf 
+            query (str): what to be extracted
+        Returns:
+            str: Search results
+        """
+        # Ingestion and search embed text and wait on the database; run them
+        # on the embedding executor instead of the event loop.
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            embedding_executor(), partial(self.write_and_search, pdf_path, query)
+        )
+
     def extract_text_from_pdf(self, pdf_path) -> str:
         """Extract text from a single PDF file using PyMuPDF."""
-        text = ""
         with fitz.open(pdf_path) as doc:
-            for page in doc:
-                text += page.get_text()
-        return text
+            return "".join(page.get_text() for page in doc)
 
     def extract_text_from_txt(self, txt_path) -> str:
         """Extract text from a single .txt file."""
@@ -66,45 +93,91 @@ class PDFKnowledgeBase(Toolkit):
         print(f"File exists at: {path}") 
         
         self.ak_tool.create()
+        self.registry.create()
         self.loaded_files.clear()
-        pdf_path = Path(path)
-        documents = []
-        
-        if pdf_path.is_file() and pdf_path.suffix.lower() == ".pdf":
-            print(f"Loading PDF (per-page): {path}")
-            with fitz.open(path) as doc:
-                for pnum, page in enumerate(doc):
-                    page_text = page.get_text()
-                    if not page_text or not page_text.strip():
-                        continue
-                    page_key = f"{path}::page::{pnum}"
-                    if page_key in self.loaded_files:
-                        continue
-                    documents.append(page_text)
-                    self.loaded_files.add(page_key)
 
-        elif pdf_path.is_dir():
-            for pdf in pdf_path.glob("**/*.pdf"):
-                if pdf.suffix.lower() == ".pdf":
-                    pdf_str = str(pdf)
-                    print(f"Loading PDF from dir: {pdf_str}")
-                    with fitz.open(pdf_str) as doc:
-                        for pnum, page in enumerate(doc):
-                            page_text = page.get_text()
-                            if not page_text or not page_text.strip():
-                                continue
-                            page_key = f"{pdf_str}::page::{pnum}"
-                            if page_key in self.loaded_files:
-                                continue
-                            documents.append(page_text)
-                            self.loaded_files.add(page_key)
-        
-        print(f"Total documents to process: {len(documents)}")  
-        
-        combined_text = "\n\n".join(documents)
-        self.ak_tool.text_data(combined_text)
+        new_files = []
+        file_hashes = {}
+        for pdf in self._pdf_files(Path(path)):
+            pdf_str = str(pdf)
+            indexed, file_hash = self.registry.is_indexed(pdf_str)
+            if indexed:
+                print(f"Already indexed, skipping: {pdf_str}")
+                continue
+            new_files.append(pdf_str)
+            file_hashes[pdf_str] = file_hash
+
+        page_counts = {}
+        pages = self.iter_pages(new_files, page_counts)
+        written = self.ak_tool.ingest(self.ak_tool.chunk_pages(pages, file_hashes))
+
+        for pdf_str in new_files:
+            # Drop the chunks of an earlier version of the file and register
+            # the new one in one transaction, so search never sees both.
+            with self.ak_tool.Session() as session, session.begin():
+                removed = self.ak_tool.delete_source(session, pdf_str, keep_file_hash=file_hashes[pdf_str])
+                self.registry.record(
+                    pdf_str,
+                    page_count=page_counts.get(pdf_str, 0),
+                    file_hash=file_hashes[pdf_str],
+                    session=session,
+                )
+            if removed:
+                print(f"Removed {removed} chunks of the previous version of {pdf_str}")
+
+        print(f"✅ Successfully processed {len(new_files)} files into {written} chunks")
+
+    def iter_pages(
+        self,
+        pdf_files: List[str],
+        page_counts: Optional[Dict[str, int]] = None,
+        workers: Optional[int] = None,
+    ) -> Iterator[Tuple[str, int, str]]:
+        """
+        Yield the text of each non-empty page, in file and page order.
+        Several files, or one file longer than a single task, are extracted
+        on a process pool; PDF_EXTRACT_WORKERS=1 keeps extraction in-process.
+        Args:
+            pdf_files(list): paths of the PDFs to read.
+            page_counts(dict): filled with the page count of each file read.
+            workers(int): number of extraction processes.
+        """
+        workers = workers or default_workers()
+        parallel = workers > 1 and pdf_files and (
+            len(pdf_files) > 1 or page_count(pdf_files[0]) > PAGES_PER_TASK
+        )
+        if parallel:
+            print(f"Extracting {len(pdf_files)} PDF(s) with {workers} processes")
+            pages = iter_pages_parallel(pdf_files, workers=workers)
+        else:
+            pages = self._iter_pages_serial(pdf_files)
+
+        for pdf_str, count, pnum, page_text in pages:
+            if page_counts is not None:
+                page_counts[pdf_str] = count
+            if not page_text or not page_text.strip():
+                continue
+            page_key = f"{pdf_str}::page::{pnum}"
+            if page_key in self.loaded_files:
+                continue
+            self.loaded_files.add(page_key)
+            yield pdf_str, pnum, page_text
 
-        print(f"✅ Successfully processed {len(documents)} documents")
+    def _iter_pages_serial(self, pdf_files: List[str]) -> Iterator[Tuple[str, int, int, str]]:
+        """Extract pages in this process, one file after another."""
+        for pdf_str in pdf_files:
+            print(f"Loading PDF (per-page): {pdf_str}")
+            with fitz.open(pdf_str) as doc:
+                for pnum, page in enumerate(doc):
+                    yield pdf_str, len(doc), pnum, page.get_text()
+
+    def _pdf_files(self, pdf_path: Path) -> List[Path]:
+        """List the PDF files under `pdf_path`, which may be a file or a directory."""
+        if pdf_path.is_file() and pdf_path.suffix.lower() == ".pdf":
+            return [pdf_path]
+        if pdf_path.is_dir():
+            return [pdf for pdf in pdf_path.glob("**/*.pdf") if pdf.suffix.lower() == ".pdf"]
+        return []
 
     def search(self, query: str):
         """
@@ -114,6 +187,6 @@ class PDFKnowledgeBase(Toolkit):
         Returns:
             list: List of matching content
         """
-        response = self.ak_tool.vector_db.search(query=query)
+        response = self.ak_tool.search_query(query)
         resp = [doc.content for doc in response]
         return resp
\ No newline at end of file
@@ -1,16 +1,103 @@
 from sqlalchemy import create_engine, text
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 from sqlalchemy.inspection import inspect
 from agno.knowledge.document import Document
 from agno.knowledge.reader.pdf_reader import PDFReader
 from agno.knowledge.reader.base import Reader
 from agno.utils.log import log_debug, log_info
 from nomic_ai import NomicAIEmbedder
+from vector_utils import DISTANCE_OPERATORS, bulk_upsert
+from vector_index import apply_search_params, create_vector_index, drop_text_index, get_vector_index
+from db_schema import check_vector_dimensions, ensure_schema
+from db_engine import disable_statement_timeout, get_db_url, get_engine
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from agno.vectordb.pgvector import PgVector, SearchType
 from agno.vectordb import VectorDb
-from typing import Optional, List
-import hashlib
+from typing import Dict, Optional, List, Iterable, Iterator, Tuple
+import os
+import queue
+import threading
+from contextlib import closing
+
+_DONE = object()
+
+# Full-text column used by hybrid search, generated from `content`.
+TSV_COLUMN = "content_tsv"
+TEXT_SEARCH_LANGUAGE = "english"
+
+
+def _prefetch(items: Iterable, maxsize: int, poll_interval: float = 0.1) -> Iterator:
+    """
+    Pull `items` on a background thread through a bounded queue.
+    The producer blocks once `maxsize` items are waiting, so a slow consumer
+    holds back extraction instead of letting it run ahead in memory.
+    If the consumer stops early (an embedding or DB error, or it simply
+    stops iterating), the producer is told to stop, the queue is drained so
+    it is not stuck in `put`, and `items` is closed, which shuts down
+    whatever it holds open (process pool, PDF documents).
+    """
+    buffer: queue.Queue = queue.Queue(maxsize=maxsize)
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=poll_interval)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in items:
+                if not put(item):
+                    return
+        except BaseException as e:
+            put(e)
+        put(_DONE)
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+    try:
+        while True:
+            item = buffer.get()
+            if item is _DONE:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        while True:
+            try:
+                buffer.get_nowait()
+            except queue.Empty:
+                break
+        # The producer leaves its loop after the item it is working on;
+        # only then can the generator be closed from this thread.
+        producer.join()
+        close = getattr(items, "close", None)
+        if close is not None:
+            close()
+
+
+def _batched(items: Iterable, size: int) -> Iterator[List]:
+    """Group an iterable into lists of at most `size` items; closing this closes `items`."""
+    batch = []
+    try:
+        for item in items:
+            batch.append(item)
+            if len(batch) >= size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+    finally:
+        close = getattr(items, "close", None)
+        if close is not None:
+            close()
+
 
 class KnowledgeBaseOperation():
     def __init__(
@@ -22,19 +109,23 @@ class KnowledgeBaseOperation():
     ):
         self.reader = reader
         self.num_documents = num_documents
+        self.search_type = search_type
         self.table_name = 'Agent_knowledge'
-        self.db_url = 'postgresql://ai:ai@pgvector:5432/ai'
+        self.db_url = get_db_url()
         self.schema = None
 
-        self.db_engine = create_engine(self.db_url)
+        # Shared with every other store so they draw from one connection pool.
+        self.db_engine = get_engine()
         self.Session = sessionmaker(bind=self.db_engine)
 
         self.embedder = NomicAIEmbedder()
 
         self.vector_db = PgVector(
             table_name=self.table_name,
-            db_url=self.db_url,
-            embedder=NomicAIEmbedder()
+            db_engine=self.db_engine,
+            embedder=self.embedder,
+            search_type=search_type,
+            vector_index=get_vector_index()
         )
 
     def chunk(self, content: str, chunk_size: int = 2000, chunk_overlap: int = 0):
@@ -51,13 +142,14 @@ class KnowledgeBaseOperation():
         )
         return text_splitters.split_text(content)
         
-    def _embeddings_(self, text: str):
+    def _embeddings_(self, texts: List[str], batch_size: int = 32):
         """
         Convert the data into numerical representation.
         Args:
-            text(str): we are taking the text in the form PDFs, Urls.
+            texts(list): we are taking the chunks of text in the form PDFs, Urls.
+            batch_size(int): Number of chunks to embed in one forward pass.
         """
-        return self.embedder.get_embedding(text)
+        return self.embedder.get_embeddings(texts, batch_size=batch_size)
     
     def table_exists(self):
         """Checking whether the table exists in database or not."""
@@ -65,20 +157,93 @@ class KnowledgeBaseOperation():
         return inspect(self.db_engine).has_table(self.table_name, schema=self.schema)
     
     def create(self):
+        """
+        Create or migrate the table, its full-text column and indexes.
+        Runs the migrations once per process; later calls issue no queries.
+        """
+        ensure_schema(self.db_engine, f"knowledge:{self.table_name}", [
+            (1, "create table", self._create_table),
+            (2, "full-text search column", self.create_text_search_column),
+            (3, "vector index", self.create_index),
+            (4, "drop duplicate full-text index", lambda: drop_text_index(self.vector_db)),
+            (5, "source index", self.create_source_index),
+        ], check=self.check_dimensions)
+
+    def check_dimensions(self):
+        """Refuse to run against a table built with another embedding size."""
+        check_vector_dimensions(self.db_engine, self.vector_db.schema, self.table_name, self.vector_db.dimensions)
+
+    def _create_table(self):
         """Creating the table."""
-        table_exists = self.table_exists()
-        print("Table exists:", table_exists)
-        
-        if not table_exists:
-            with self.Session() as session, session.begin():
-                log_debug("creating extension: vector")
-                session.execute(text("create extension if not exists vector"))
-                if self.schema:
-                    log_debug(f"Creating schema: {self.schema}")
-                    session.execute(text(f"CREATE SCHEMA IF NOT EXISTS {self.schema};"))
-                
-                self.vector_db.create()
-                log_info(f"Created table {self.table_name} successfully.")
+        with self.Session() as session, session.begin():
+            if self.schema:
+                log_debug(f"Creating schema: {self.schema}")
+                session.execute(text(f"CREATE SCHEMA IF NOT EXISTS {self.schema};"))
+
+        self.vector_db.create()
+        log_info(f"Created table {self.table_name} successfully.")
+
+    def _qualified_table(self) -> str:
+        """Quoted schema.table name of the PgVector table for raw SQL."""
+        if self.vector_db.schema:
+            return f'"{self.vector_db.schema}"."{self.vector_db.table_name}"'
+        return f'"{self.vector_db.table_name}"'
+
+    def create_text_search_column(self):
+        """Add a stored tsvector column over the chunk text with a GIN index, for hybrid search."""
+        table = self._qualified_table()
+        with self.Session() as session, session.begin():
+            # Adding a stored column rewrites the table.
+            disable_statement_timeout(session)
+            session.execute(text(
+                f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {TSV_COLUMN} tsvector "
+                f"GENERATED ALWAYS AS (to_tsvector('{TEXT_SEARCH_LANGUAGE}', coalesce(content, ''))) STORED"
+            ))
+            session.execute(text(
+                f'CREATE INDEX IF NOT EXISTS "idx_{self.vector_db.table_name}_{TSV_COLUMN}" '
+                f"ON {table} USING gin ({TSV_COLUMN})"
+            ))
+
+    def create_source_index(self):
+        """Index the chunks' source path, so one file's chunks can be found and deleted."""
+        with self.Session() as session, session.begin():
+            disable_statement_timeout(session)
+            session.execute(text(
+                f'CREATE INDEX IF NOT EXISTS "idx_{self.vector_db.table_name}_source" '
+                f"ON {self._qualified_table()} ((meta_data->>'source'))"
+            ))
+
+    def delete_source(self, session: Session, source: str, keep_file_hash: Optional[str] = None) -> int:
+        """
+        Delete the chunks of one file, except those of the version being kept.
+        Runs in the caller's transaction, so the swap can commit together
+        with other bookkeeping.
+        Args:
+            session(Session): session with an open transaction.
+            source(str): the file's path as stored in the chunks' meta_data.
+            keep_file_hash(str): file hash of the version whose chunks stay.
+        Returns:
+            int: number of chunks deleted.
+        """
+        return session.execute(text(f"""
+            DELETE FROM {self._qualified_table()}
+            WHERE meta_data->>'source' = :source
+              AND meta_data->>'file_hash' IS DISTINCT FROM :file_hash
+        """), {"source": source, "file_hash": keep_file_hash}).rowcount
+
+    def create_index(self, force_recreate: bool = False):
+        """
+        Create the vector (HNSW or IVFFlat) index if it is missing.  Full-text
+        search uses the GIN index on `content_tsv`, so PgVector.optimize, which
+        would add a second one, is not used.
+        Args:
+            force_recreate(bool): drop and rebuild the existing index.
+        """
+        create_vector_index(self.vector_db, force_recreate=force_recreate)
+
+    def rebuild_index(self):
+        """Rebuild the vector index, e.g. so IVFFlat lists match the row count after a bulk load."""
+        self.create_index(force_recreate=True)
 
     def insert(self, documents: List[Document], batch_size: int = 200):
         """
@@ -87,12 +252,8 @@ class KnowledgeBaseOperation():
             documents(list): list of documents
             batch_size(int): Number of documents to insert into the batch.
         """
-        for i in range(0, len(documents), batch_size):
-            docs = documents[i:i+batch_size]
-            log_debug(f"from batch start index {i} to {len(docs)}")
-            for doc in docs:
-                unique_hash = hashlib.sha256(doc.content.encode("utf-8")).hexdigest()
-                self.vector_db.upsert(documents=[doc], content_hash=unique_hash)
+        written = bulk_upsert(self.vector_db, documents, batch_size=batch_size)
+        log_debug(f"Inserted {written} documents in batches of {batch_size}")
 
     def upsert(self, documents: List[Document], batch_size: int = 2000):
         """
@@ -101,12 +262,8 @@ class KnowledgeBaseOperation():
             documents(list): list of documents.
             batch_size(int): Number of documents to update in the each batch.
         """
-        for i in range(0, len(documents), batch_size):
-            batch_docs = documents[i: i + batch_size]
-            log_debug(f"From batch start index {i} to {len(batch_docs)}")
-            for doc in batch_docs:
-                unique_hash = hashlib.sha256(doc.content.encode("utf-8")).hexdigest()
-                self.vector_db.upsert(documents=[doc], content_hash=unique_hash)
+        written = bulk_upsert(self.vector_db, documents, batch_size=batch_size)
+        log_debug(f"Upserted {written} documents in batches of {batch_size}")
 
     def search_query(self, query: str):
         """
@@ -114,10 +271,117 @@ class KnowledgeBaseOperation():
         Args:
             query(str): search the query
         """
-        response = self.vector_db.search(query=query)
+        if self.search_type == SearchType.hybrid:
+            response = self.hybrid_search(query=query, limit=self.num_documents)
+        else:
+            response = self.vector_db.search(query=query, limit=self.num_documents)
         log_debug(f"Found the {len(response)} matching document.")
         return response
+
+    def hybrid_search(self, query: str, limit: int = 3, candidates: int = 40, rrf_k: int = 60) -> List[Document]:
+        """
+        Combine vector and full-text search with reciprocal rank fusion.
+        Each side ranks its own top `candidates`; a chunk scores
+        1 / (rrf_k + rank) for every list it appears in, so chunks matching
+        exact clause numbers or defined terms rise even when their embedding
+        is only a moderate match.
+        Args:
+            query(str): search the query
+            limit(int): number of documents to return.
+            candidates(int): number of hits taken from each ranking.
+            rrf_k(int): rank offset that damps the weight of the very top hits.
+        """
+        embedding = self.embedder.get_embedding(query)
+        operator = DISTANCE_OPERATORS.get(self.vector_db.distance, "<=>")
+        table = self._qualified_table()
+
+        sql = text(f"""
+            WITH vector_hits AS (
+                SELECT id, row_number() OVER (ORDER BY embedding {operator} CAST(:embedding AS vector)) AS rank
+                FROM {table}
+                ORDER BY embedding {operator} CAST(:embedding AS vector)
+                LIMIT :candidates
+            ),
+            keyword_hits AS (
+                SELECT id, row_number() OVER (ORDER BY ts_rank_cd({TSV_COLUMN}, q) DESC) AS rank
+                FROM {table}, websearch_to_tsquery('{TEXT_SEARCH_LANGUAGE}', :query) AS q
+                WHERE {TSV_COLUMN} @@ q
+                ORDER BY ts_rank_cd({TSV_COLUMN}, q) DESC
+                LIMIT :candidates
+            )
+            SELECT t.id, t.name, t.meta_data, t.content,
+                   COALESCE(1.0 / (:rrf_k + v.rank), 0) + COALESCE(1.0 / (:rrf_k + k.rank), 0) AS score
+            FROM vector_hits v
+            FULL OUTER JOIN keyword_hits k ON v.id = k.id
+            JOIN {table} t ON t.id = COALESCE(v.id, k.id)
+            ORDER BY score DESC
+            LIMIT :limit
+        """)
+
+        with self.Session() as session, session.begin():
+            # Let the ANN index return enough candidates for the vector side.
+            apply_search_params(session, self.vector_db.vector_index, candidates)
+
+            rows = session.execute(sql, {
+                "embedding": str(list(embedding)),
+                "query": query,
+                "candidates": candidates,
+                "rrf_k": rrf_k,
+                "limit": limit,
+            }).fetchall()
+
+        return [
+            Document(id=row.id, name=row.name, meta_data=row.meta_data or {}, content=row.content)
+            for row in rows
+        ]
     
+    def chunk_pages(
+        self,
+        pages: Iterable[Tuple[str, int, str]],
+        file_hashes: Optional[Dict[str, str]] = None,
+    ) -> Iterator[Document]:
+        """
+        Chunk pages one at a time, keeping the source and page number on each chunk.
+        Args:
+            pages(iterable): (source path, page index, page text) tuples.
+            file_hashes(dict): source path -> file hash, stored on each chunk so
+                the chunks of an older version of the file can be told apart.
+        """
+        file_hashes = file_hashes or {}
+        for source, page_index, page_text in pages:
+            for chunk in self.chunk(page_text):
+                meta_data = {"source": source, "page": page_index + 1}
+                if source in file_hashes:
+                    meta_data["file_hash"] = file_hashes[source]
+                yield Document(
+                    content=chunk,
+                    name=os.path.basename(source),
+                    meta_data=meta_data,
+                )
+
+    def ingest(self, documents: Iterable[Document], batch_size: int = 64, max_pending: int = 4) -> int:
+        """
+        Embed and store documents as they are produced.
+        Producing (extraction, chunking) runs on a background thread while batches
+        are embedded and upserted here; at most `max_pending` batches wait in
+        between, which bounds memory for very large files.
+        Args:
+            documents(iterable): documents to store, typically a generator.
+            batch_size(int): Number of chunks to embed and upsert together.
+            max_pending(int): Number of batches allowed to queue up.
+        Returns:
+            int: number of rows written.
+        """
+        self.create()
+        written = 0
+        # closing() stops the producer as soon as a batch fails, not when the generator is collected.
+        with closing(_prefetch(_batched(documents, batch_size), max_pending)) as batches:
+            for batch in batches:
+                written += bulk_upsert(self.vector_db, batch, batch_size=batch_size)
+                last = batch[-1].meta_data or {}
+                log_info(f"Stored {written} chunks so far (up to page {last.get('page', '?')} of {last.get('source', 'text')})")
+        return written
+
     def text_data(self, text: str):
         """
         Loads and store the text data in database.
@@ -128,14 +392,14 @@ class KnowledgeBaseOperation():
             chunks = self.chunk(text)
             print(f"Chunked into {len(chunks)} parts")
 
+            embeddings = self._embeddings_(chunks)
+            print(f"Embedded {len(embeddings)} chunks")
+
             data = []
-            for idx, chunk in enumerate(chunks):
+            for idx, (chunk, embedding) in enumerate(zip(chunks, embeddings)):
                 preview = chunk[:200].replace("\n", " ")
                 print(f"Chunk {idx} preview: {preview}...")
 
-                embedding = self._embeddings_(chunk)
-                print(f"Embedding type for chunk {idx}: {type(embedding)}; length: {len(embedding) if hasattr(embedding, '__len__') else 'unknown'}")
-                
                 doc = Document(
                     content=chunk, 
                     embedding=embedding, 
@@ -0,0 +1,77 @@
+# agent_registry.py
+# -------------------------------------------------------------
+# Small TTL cache used to reuse agents, model clients and toolkits
+# across /chat/ requests.
+# -------------------------------------------------------------
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+from agno.utils.log import log_debug
+
+
+def hash_secret(value: str) -> str:
+    """Hash an API key so it can be part of a cache key without being stored."""
+    return hashlib.sha256((value or "").encode("utf-8")).hexdigest()
+
+
+class TTLRegistry:
+    """
+    Thread-safe map of key -> object.  Entries expire `ttl_seconds` after
+    their last use and the least recently used entry is dropped once
+    `max_entries` is exceeded.
+    """
+
+    def __init__(self, name: str, ttl_seconds: float = 900, max_entries: int = 64):
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _evict(self, now: float):
+        """Drop expired entries, then the oldest ones over the size limit."""
+        for key in [key for key, (expires, _) in self._entries.items() if expires <= now]:
+            del self._entries[key]
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get_or_create(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        """
+        Return the cached object for `key`, building it with `factory` on a miss.
+        Args:
+            key: hashable cache key.
+            factory: zero-argument callable that builds the object.
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._evict(now)
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries[key] = (now + self.ttl_seconds, entry[1])
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        # Build outside the lock; building a toolkit can take a while.
+        value = factory()
+        log_debug(f"{self.name}: created new entry")
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                # Another request built it first; keep that one.
+                return entry[1]
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._evict(time.monotonic())
+        return value
+
+    def stats(self) -> Dict[str, int]:
+        """Current size and hit/miss counters."""
+        with self._lock:
+            return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
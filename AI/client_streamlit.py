@@ -1,10 +1,12 @@
 import streamlit as st
 import requests
 import os
+import json
+import uuid
 from file_store import save_file
 from gtts import gTTS
 from tempfile import NamedTemporaryFile
-from llms.provider_factory import ProviderFactory
+from llms.provider_factory import get_provider_factory
 
 try:
     import speech_recognition as sr
@@ -13,11 +15,12 @@ except Exception:
     HAS_SR = False
 
 API_URL = os.getenv("FASTAPI_URL", "http://fastapi:8000/chat/")
+STREAM_URL = os.getenv("FASTAPI_STREAM_URL", API_URL.rstrip("/") + "/stream/")
 
 st.set_page_config(page_title="Chat with Agent", layout="centered")
 st.title("Streamlit Interface (via FastAPI)")
 
-provider_factory = ProviderFactory()
+provider_factory = get_provider_factory()
 available_providers = provider_factory.get_all_providers_names()
 
 with st.sidebar:
@@ -31,6 +34,7 @@ with st.sidebar:
     except:
         model_id = st.text_input("Model ID")
     
+    user_id = st.text_input("User ID (optional)") or None
     selected_tool = st.selectbox("Select Tool", ["None", "Brave Search", "Crawl AI", "Serp Tool", "Contract Parser"])
 
     tool_config = {}
@@ -49,33 +53,65 @@ with st.sidebar:
 
 if "messages" not in st.session_state:
     st.session_state.messages = []
+# One memory session per browser session.
+if "session_id" not in st.session_state:
+    st.session_state.session_id = str(uuid.uuid4())
 
 for msg in st.session_state.messages:
     with st.chat_message(msg["role"]):
         st.markdown(msg["content"])
 
-def call_api(prompt_text):
+def stream_api(prompt_text):
+    """Post the prompt to the streaming endpoint and yield (event, data) pairs."""
     payload = {
         "message": prompt_text,
         "provider": provider,
         "api_key": api_key,
         "id": model_id or "local",
         "tool": selected_tool,
-        "tool_config": tool_config
+        "tool_config": tool_config,
+        "session_id": st.session_state.session_id,
+        "user_id": user_id,
     }
     try:
-        res = requests.post(API_URL, json=payload, timeout=60)
+        # The read timeout applies between events, not to the whole answer.
+        with requests.post(STREAM_URL, json=payload, stream=True, timeout=(10, 120)) as res:
+            if res.status_code != 200:
+                yield "error", {"error": res.text}
+                return
+            if not res.headers.get("content-type", "").startswith("text/event-stream"):
+                yield "error", res.json()
+                return
+
+            event = "message"
+            for line in res.iter_lines(decode_unicode=True):
+                if line.startswith("event:"):
+                    event = line[len("event:"):].strip()
+                elif line.startswith("data:"):
+                    yield event, json.loads(line[len("data:"):].strip())
+                    event = "message"
     except Exception as e:
-        return {"error": f"Request failed: {e}"}
-
-    if res.status_code != 200:
-        return {"error": res.text}
-
-    try:
-        data = res.json()
-    except Exception as e:
-        return {"error": f"Invalid JSON from API: {e}"}
-    return data
+        yield "error", {"error": f"Request failed: {e}"}
+
+def render_reply(prompt_text):
+    """Show the assistant reply as it streams in and keep it in the history."""
+    with st.chat_message("assistant"):
+        placeholder = st.empty()
+        reply = ""
+        for event, data in stream_api(prompt_text):
+            if event == "token":
+                reply += data.get("content", "")
+                placeholder.markdown(reply + "▌")
+            elif event == "tool_call_started":
+                st.caption(f"Using tool: {data.get('tool')}")
+            elif event == "done":
+                reply = data.get("response", reply)
+            elif event == "error":
+                st.error("API Error")
+                st.write(data.get("error", data))
+                return
+        placeholder.markdown(reply)
+    st.session_state.messages.append({"role": "assistant", "content": reply})
 
 if prompt := st.chat_input("Type your message..."):
     st.chat_message("user").markdown(prompt)
@@ -84,16 +120,7 @@ if prompt := st.chat_input("Type your message..."):
     if not api_key or not model_id:
         st.error("Please enter API key and model ID in the sidebar.")
     else:
-        with st.spinner("Thinking..."):
-            data = call_api(prompt)
-
-        if "response" in data:
-            reply = data["response"]
-            st.chat_message("assistant").markdown(reply)
-            st.session_state.messages.append({"role": "assistant", "content": reply})
-        else:
-            st.error("API Error")
-            st.write(data.get("error", data))
+        render_reply(prompt)
 
 if st.button("Speak"):
     if not HAS_SR:
@@ -106,15 +133,7 @@ if st.button("Speak"):
         try:
             spoken_text = recognizer.recognize_google(audio)
             st.success(f"You said: {spoken_text}")
-            with st.spinner("Thinking..."):
-                data = call_api(spoken_text)
-            if "response" in data:
-                reply = data["response"]
-                st.chat_message("assistant").markdown(reply)
-                st.session_state.messages.append({"role": "assistant", "content": reply})
-            else:
-                st.error("API Error")
-                st.write(data.get("error", data))
+            render_reply(spoken_text)
         except Exception as e:
             st.error(f"Could not understand audio: {e}")
 
@@ -0,0 +1,116 @@
+# db_engine.py
+# -------------------------------------------------------------
+# One SQLAlchemy engine per process, shared by every pgvector store
+# -------------------------------------------------------------
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from sqlalchemy import create_engine, exc, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+DEFAULT_DB_URL = "postgresql://ai:ai@pgvector:5432/ai"
+
+
+def get_db_url() -> str:
+    """Database URL from $DATABASE_URL, defaulting to the docker-compose pgvector service."""
+    return os.getenv("DATABASE_URL", DEFAULT_DB_URL)
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long callers wait for a connection."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self.waits = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.timeouts = 0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            # Only pool exhaustion; a failed connect is not a wait timeout.
+            with self._stats_lock:
+                self.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            with self._stats_lock:
+                self.waits += 1
+                self.wait_seconds_total += waited
+                self.wait_seconds_max = max(self.wait_seconds_max, waited)
+
+
+_engine: Optional[Engine] = None
+_engine_lock = threading.Lock()
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    return os.getenv(name, str(default)).lower() in ("1", "true", "yes")
+
+
+def get_engine() -> Engine:
+    """
+    Return the process-wide engine, creating it on first use.
+    Pool settings come from the environment: DB_POOL_SIZE, DB_MAX_OVERFLOW,
+    DB_POOL_TIMEOUT (seconds), DB_POOL_RECYCLE (seconds), DB_POOL_PRE_PING
+    and DB_STATEMENT_TIMEOUT_MS (0 disables the server-side timeout).
+    """
+    global _engine
+    if _engine is not None:
+        return _engine
+
+    with _engine_lock:
+        if _engine is None:
+            connect_args = {}
+            statement_timeout = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", 30000))
+            if statement_timeout:
+                connect_args["options"] = f"-c statement_timeout={statement_timeout}"
+
+            _engine = create_engine(
+                get_db_url(),
+                poolclass=TimedQueuePool,
+                pool_size=int(os.getenv("DB_POOL_SIZE", 5)),
+                max_overflow=int(os.getenv("DB_MAX_OVERFLOW", 10)),
+                pool_timeout=float(os.getenv("DB_POOL_TIMEOUT", 30)),
+                pool_recycle=int(os.getenv("DB_POOL_RECYCLE", 1800)),
+                pool_pre_ping=_env_bool("DB_POOL_PRE_PING", True),
+                connect_args=connect_args,
+            )
+    return _engine
+
+
+def disable_statement_timeout(conn):
+    """
+    Lift DB_STATEMENT_TIMEOUT_MS for the current transaction only.  For
+    migrations and index builds, which can legitimately run for minutes.
+    Args:
+        conn: Session or Connection with an open transaction.
+    """
+    conn.execute(text("SET LOCAL statement_timeout = 0"))
+
+
+def pool_metrics() -> Dict[str, Any]:
+    """Connection pool gauges and wait-time counters for monitoring."""
+    pool = get_engine().pool
+    metrics: Dict[str, Any] = {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": pool.overflow(),
+    }
+    if isinstance(pool, TimedQueuePool):
+        with pool._stats_lock:
+            metrics.update({
+                "waits": pool.waits,
+                "wait_seconds_avg": pool.wait_seconds_total / pool.waits if pool.waits else 0.0,
+                "wait_seconds_max": pool.wait_seconds_max,
+                "timeouts": pool.timeouts,
+            })
+    return metrics
@@ -0,0 +1,157 @@
+# db_schema.py
+# -------------------------------------------------------------
+# One-time schema bootstrap with versioned migrations.
+#
+# Each store lists its migrations as (version, description, callable).
+# The first call per process applies whatever is pending, records it in
+# `schema_migrations`, and marks the component ready; after that
+# `ensure_schema` is a set lookup, so hot paths issue no catalog queries.
+# -------------------------------------------------------------
+import threading
+from typing import Callable, List, Optional, Set, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from agno.utils.log import log_debug, log_info
+from db_engine import disable_statement_timeout
+
+Migration = Tuple[int, str, Callable[[], None]]
+
+MIGRATIONS_SCHEMA = "ai"
+MIGRATIONS_TABLE = "schema_migrations"
+
+# Process-level "schema ready" state, keyed by component name.
+_ready: Set[str] = set()
+_ready_lock = threading.Lock()
+
+
+def apply_migrations(engine: Engine, component: str, migrations: List[Migration]) -> int:
+    """
+    Apply the migrations of `component` that are newer than its recorded version.
+    A Postgres advisory lock serialises workers that start at the same time.
+    Migrations should be idempotent, since one may have run before a crash
+    stopped its version from being recorded.
+    Args:
+        engine(Engine): database engine.
+        component(str): name the versions are recorded under.
+        migrations(list): (version, description, callable) tuples.
+    Returns:
+        int: the component's schema version after migrating.
+    """
+    table = f'"{MIGRATIONS_SCHEMA}"."{MIGRATIONS_TABLE}"'
+    with engine.connect() as conn:
+        # Waiting for another worker's migrations may take longer than the
+        # statement timeout.
+        disable_statement_timeout(conn)
+        conn.execute(text("SELECT pg_advisory_lock(hashtext(:key))"), {"key": MIGRATIONS_TABLE})
+        conn.commit()
+        try:
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
+            conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {MIGRATIONS_SCHEMA}"))
+            conn.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {table} ("
+                "component TEXT NOT NULL, "
+                "version INTEGER NOT NULL, "
+                "description TEXT, "
+                "applied_at TIMESTAMPTZ NOT NULL DEFAULT now(), "
+                "PRIMARY KEY (component, version))"
+            ))
+            conn.commit()
+
+            current = conn.execute(
+                text(f"SELECT coalesce(max(version), 0) FROM {table} WHERE component = :component"),
+                {"component": component},
+            ).scalar()
+
+            for version, description, migrate in sorted(migrations, key=lambda m: m[0]):
+                if version <= current:
+                    continue
+                log_info(f"Migrating {component} to version {version}: {description}")
+                migrate()
+                conn.execute(
+                    text(f"INSERT INTO {table} (component, version, description) "
+                         "VALUES (:component, :version, :description)"),
+                    {"component": component, "version": version, "description": description},
+                )
+                conn.commit()
+                current = version
+        finally:
+            conn.execute(text("SELECT pg_advisory_unlock(hashtext(:key))"), {"key": MIGRATIONS_TABLE})
+            conn.commit()
+
+    log_debug(f"{component} schema at version {current}")
+    return current
+
+
+def ensure_schema(
+    engine: Engine,
+    component: str,
+    migrations: List[Migration],
+    check: Optional[Callable[[], None]] = None,
+):
+    """
+    Bring `component` up to date once per process; later calls return immediately.
+    Args:
+        engine(Engine): database engine.
+        component(str): name the versions are recorded under.
+        migrations(list): (version, description, callable) tuples.
+        check(callable): run after migrating; an exception leaves the
+            component not ready, so every later call fails the same way.
+    """
+    if component in _ready:
+        return
+    with _ready_lock:
+        if component in _ready:
+            return
+        apply_migrations(engine, component, migrations)
+        if check is not None:
+            check()
+        _ready.add(component)
+
+
+def check_vector_dimensions(engine: Engine, schema: str, table: str, dimensions: int, column: str = "embedding"):
+    """
+    Fail fast when an existing vector column has another width than the
+    embedder produces, e.g. after EMBEDDING_DIMENSIONS was changed.
+    Otherwise every insert and search would fail with a pgvector error.
+    Args:
+        engine(Engine): database engine.
+        schema(str): schema of the table.
+        table(str): table name.
+        dimensions(int): vector size the embedder produces.
+        column(str): the vector column.
+    """
+    with engine.connect() as conn:
+        width = conn.execute(text("""
+            SELECT a.atttypmod FROM pg_attribute a
+            JOIN pg_class c ON c.oid = a.attrelid
+            JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE n.nspname = :schema AND c.relname = :table AND a.attname = :column AND NOT a.attisdropped
+        """), {"schema": schema, "table": table, "column": column}).scalar()
+    # pgvector keeps the dimension count in atttypmod; -1 means unconstrained.
+    if width is not None and width > 0 and width != dimensions:
+        raise ValueError(
+            f'{schema}.{table}.{column} holds {width}-dimension vectors but the embedder '
+            f"produces {dimensions} (EMBEDDING_DIMENSIONS). Set EMBEDDING_DIMENSIONS={width}, "
+            "or drop the table and ingest again to change the size."
+        )
+
+
+def is_ready(component: str) -> bool:
+    """Whether `component` has been bootstrapped in this process."""
+    return component in _ready
+
+
+def bootstrap():
+    """Create or migrate every table the app uses; called once at startup."""
+    from agent_knowledge_base import KnowledgeBaseOperation
+    from document_registry import DocumentRegistry
+    from memory_store import MemoryStore
+    from response_cache import SemanticResponseCache
+
+    knowledge_base = KnowledgeBaseOperation()
+    knowledge_base.create()
+    DocumentRegistry(knowledge_base.db_engine, schema=knowledge_base.vector_db.schema).create()
+    MemoryStore().init_table()
+    SemanticResponseCache().create()
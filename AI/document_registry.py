@@ -0,0 +1,139 @@
+# document_registry.py
+# -------------------------------------------------------------
+# Tracks which files are already ingested into the knowledge base
+# -------------------------------------------------------------
+import hashlib
+import os
+from typing import Optional, Tuple
+
+from sqlalchemy import (
+    BigInteger, Column, DateTime, Float, Integer, MetaData, String, Table, func, select, text,
+)
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from agno.utils.log import log_debug, log_info
+
+from db_schema import ensure_schema
+
+
+def file_sha256(path: str, block_size: int = 1 << 20) -> str:
+    """Hash a file in blocks so large PDFs are not read into memory at once."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class DocumentRegistry:
+    """
+    One row per ingested file (path, content hash, mtime, size, page count),
+    stored in the same schema as the `Agent_knowledge` table.  A file whose
+    mtime and size, or failing that content hash, match its own row does not
+    need to be extracted, chunked and embedded again.
+    """
+
+    def __init__(
+        self,
+        db_engine: Engine,
+        table_name: str = "Agent_documents",
+        schema: Optional[str] = "ai",
+    ):
+        self.db_engine = db_engine
+        self.table_name = table_name
+        self.schema = schema
+        self.Session = sessionmaker(bind=self.db_engine)
+
+        self.table = Table(
+            self.table_name,
+            MetaData(schema=self.schema),
+            Column("path", String, primary_key=True),
+            Column("file_hash", String, index=True),
+            Column("mtime", Float),
+            Column("size", BigInteger),
+            Column("page_count", Integer),
+            Column("indexed_at", DateTime(timezone=True), server_default=func.now()),
+        )
+
+    def create(self):
+        """Create the registry table; runs once per process."""
+        ensure_schema(self.db_engine, f"documents:{self.table_name}", [
+            (1, "create table", self._create_table),
+        ])
+
+    def _create_table(self):
+        with self.Session() as session, session.begin():
+            if self.schema:
+                session.execute(text(f"CREATE SCHEMA IF NOT EXISTS {self.schema};"))
+        self.table.create(self.db_engine, checkfirst=True)
+
+    def is_indexed(self, path: str) -> Tuple[bool, Optional[str]]:
+        """
+        Check whether the file at `path` is already in the knowledge base.
+        Only the row of the same path counts: chunks are stored per path, so
+        a file that now matches some other registered file still has its old
+        chunks to replace.
+        Args:
+            path(str): path to the file.
+        Returns:
+            tuple: (indexed, SHA-256 of the file or None when it was not
+            needed), so callers need not hash the file again.
+        """
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+
+        with self.Session() as session:
+            row = session.execute(
+                select(self.table).where(self.table.c.path == path)
+            ).first()
+        if row is not None and row.mtime == stat.st_mtime and row.size == stat.st_size:
+            log_debug(f"{path} unchanged since it was indexed")
+            return True, row.file_hash
+
+        file_hash = file_sha256(path)
+        if row is None or row.file_hash != file_hash:
+            return False, file_hash
+
+        # Touched but identical: refresh mtime so the next check is a stat.
+        log_debug(f"{path} touched but unchanged since it was indexed")
+        self.record(path, page_count=row.page_count, file_hash=file_hash)
+        return True, file_hash
+
+    def record(
+        self,
+        path: str,
+        page_count: int,
+        file_hash: Optional[str] = None,
+        session: Optional[Session] = None,
+    ):
+        """
+        Mark the file at `path` as indexed.
+        Args:
+            path(str): path to the file.
+            page_count(int): number of pages in the document.
+            file_hash(str): SHA-256 of the file, computed when not given.
+            session(Session): write in this session's open transaction
+                instead of committing on its own.
+        """
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        values = {
+            "path": path,
+            "file_hash": file_hash or file_sha256(path),
+            "mtime": stat.st_mtime,
+            "size": stat.st_size,
+            "page_count": page_count,
+        }
+        stmt = postgresql.insert(self.table).values(**values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["path"],
+            set_={**values, "indexed_at": func.now()},
+        )
+        if session is not None:
+            session.execute(stmt)
+        else:
+            with self.Session() as session, session.begin():
+                session.execute(stmt)
+        log_info(f"Registered {path} ({page_count} pages)")
@@ -0,0 +1,178 @@
+# embedding_cache.py
+# -------------------------------------------------------------
+# On-disk cache of embeddings keyed by (model, dimensions, content hash)
+# -------------------------------------------------------------
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from agno.utils.log import log_debug
+
+# Eviction trims the table to this share of max_entries, so the COUNT(*)
+# that confirms an overflow runs once per batch of evictions rather than
+# on every put.
+EVICT_TO = 0.9
+
+
+def content_hash(text: str) -> str:
+    """SHA-256 of the text, the same key KnowledgeBaseOperation uses for chunks."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    A small SQLite store of float32 vectors.  Rows are keyed by
+    (model id, dimensions, content hash) and evicted least-recently-used
+    once the table grows past `max_entries`.  The row count is tracked in
+    memory and re-read from the table only when it passes the limit.
+    """
+
+    def __init__(self, path: str, max_entries: int = 200_000):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS embeddings (
+                    model_id TEXT NOT NULL,
+                    dimensions INTEGER NOT NULL,
+                    content_hash TEXT NOT NULL,
+                    vector BLOB NOT NULL,
+                    tokens INTEGER NOT NULL,
+                    last_used REAL NOT NULL,
+                    PRIMARY KEY (model_id, dimensions, content_hash)
+                )
+                """
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings (last_used)"
+            )
+            (self._count,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+
+    def get_many(
+        self, model_id: str, dimensions: int, hashes: Iterable[str]
+    ) -> Dict[str, Tuple[List[float], int]]:
+        """
+        Look up cached vectors.
+        Args:
+            model_id(str): embedding model id.
+            dimensions(int): vector size.
+            hashes(list): content hashes to look up.
+        Returns:
+            dict: content hash -> (embedding, token count) for every hit.
+        """
+        wanted = list(dict.fromkeys(hashes))
+        found: Dict[str, Tuple[List[float], int]] = {}
+        if not wanted:
+            return found
+
+        now = time.time()
+        with self._lock, self._conn:
+            # Stay well below SQLite's bound-parameter limit.
+            for start in range(0, len(wanted), 500):
+                part = wanted[start:start + 500]
+                placeholders = ",".join("?" * len(part))
+                rows = self._conn.execute(
+                    f"SELECT content_hash, vector, tokens FROM embeddings "
+                    f"WHERE model_id = ? AND dimensions = ? AND content_hash IN ({placeholders})",
+                    (model_id, dimensions, *part),
+                ).fetchall()
+                for hash_, blob, tokens in rows:
+                    vector = array("f")
+                    vector.frombytes(blob)
+                    found[hash_] = (vector.tolist(), tokens)
+
+            if found:
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_used = ? "
+                    "WHERE model_id = ? AND dimensions = ? AND content_hash = ?",
+                    [(now, model_id, dimensions, hash_) for hash_ in found],
+                )
+
+        log_debug(f"Embedding cache: {len(found)} hits, {len(wanted) - len(found)} misses")
+        return found
+
+    def put_many(
+        self, model_id: str, dimensions: int, items: Dict[str, Tuple[List[float], int]]
+    ):
+        """
+        Store vectors and evict the least recently used rows over the limit.
+        Args:
+            model_id(str): embedding model id.
+            dimensions(int): vector size.
+            items(dict): content hash -> (embedding, token count).
+        """
+        if not items:
+            return
+
+        now = time.time()
+        rows = [
+            (model_id, dimensions, hash_, array("f", embedding).tobytes(), tokens, now)
+            for hash_, (embedding, tokens) in items.items()
+        ]
+        with self._lock, self._conn:
+            inserted = self._conn.executemany(
+                "INSERT OR IGNORE INTO embeddings "
+                "(model_id, dimensions, content_hash, vector, tokens, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            ).rowcount
+            if inserted < len(rows):
+                # Some were cached meanwhile, by another thread or process; refresh them.
+                self._conn.executemany(
+                    "UPDATE embeddings SET vector = ?, tokens = ?, last_used = ? "
+                    "WHERE model_id = ? AND dimensions = ? AND content_hash = ?",
+                    [(blob, tokens, now, model, dims, hash_) for model, dims, hash_, blob, tokens, now in rows],
+                )
+            self._count += inserted
+            if self._count > self.max_entries:
+                self._evict()
+
+    def _evict(self):
+        """Trim the table to EVICT_TO of `max_entries`, dropping the least recently used rows."""
+        # Other processes may share the file, so recount before deleting.
+        (self._count,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        if self._count <= self.max_entries:
+            return
+        overflow = self._count - int(self.max_entries * EVICT_TO)
+        self._conn.execute(
+            "DELETE FROM embeddings WHERE rowid IN "
+            "(SELECT rowid FROM embeddings ORDER BY last_used ASC LIMIT ?)",
+            (overflow,),
+        )
+        self._count -= overflow
+        log_debug(f"Embedding cache: evicted {overflow} entries")
+
+
+_default_cache: Optional[EmbeddingCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> Optional[EmbeddingCache]:
+    """
+    Return the process-wide cache configured from the environment.
+    EMBEDDING_CACHE_PATH sets the SQLite file (empty disables caching) and
+    EMBEDDING_CACHE_MAX_ENTRIES bounds its size.
+    """
+    global _default_cache
+
+    path = os.getenv("EMBEDDING_CACHE_PATH", "./embedding_cache/embeddings.sqlite3")
+    if not path:
+        return None
+
+    with _default_cache_lock:
+        if _default_cache is None:
+            max_entries = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", 200_000))
+            _default_cache = EmbeddingCache(path, max_entries=max_entries)
+    return _default_cache
@@ -119,14 +119,17 @@ Text:
         model = self._build_model(schema)
         prompt = self._build_prompt(text, schema)
 
-        result = lx.extract(
-            text_or_documents=text,
-            prompt_description=prompt,
-            model=model,
-            use_schema_constraints=True,
-            fence_output=True,
-            debug=False,
-        )
+        try:
+            result = lx.extract(
+                text_or_documents=text,
+                prompt_description=prompt,
+                model=model,
+                use_schema_constraints=True,
+                fence_output=True,
+                debug=False,
+            )
+        finally:
+            model.close()
 
         parsed = self._parse_result(result)
 
@@ -1,23 +1,31 @@
-from .base_provider import BaseProvider
-from .openai_provider import OpenAIProvider
-from .claude_provider import ClaudeProvider
-from .gemini_provider import GeminiProvider
-from .groq_provider import GroqProvider
-from .mistral_provider import MistralProvider
-from .ollama_provider import OllamaProvider
-from .perplexity_provider import PerplexityProvider
-from .provider_factory import ProviderFactory
-from .langextract_provider import CustomOPProvider
+import importlib
 
-__all__ = [
-    'BaseProvider',
-    'OpenAIProvider',
-    'ClaudeProvider',
-    'GeminiProvider',
-    'GroqProvider',
-    'MistralProvider',
-    'OllamaProvider',
-    'PerplexityProvider',
-    'ProviderFactory',
-    'CustomOPProvider'
-]
\ No newline at end of file
+# Exports are resolved on first access (PEP 562), so importing one
+# submodule, e.g. llms.completion_cache, does not load every provider SDK.
+_EXPORTS = {
+    'BaseProvider': '.base_provider',
+    'OpenAIProvider': '.openai_provider',
+    'ClaudeProvider': '.claude_provider',
+    'GeminiProvider': '.gemini_provider',
+    'GroqProvider': '.groq_provider',
+    'MistralProvider': '.mistral_provider',
+    'OllamaProvider': '.ollama_provider',
+    'PerplexityProvider': '.perplexity_provider',
+    'ProviderFactory': '.provider_factory',
+    'get_provider_factory': '.provider_factory',
+    'CustomOPProvider': '.langextract_provider',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
@@ -1,17 +1,104 @@
+import asyncio
+import weakref
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+from .completion_cache import CompletionCache, get_completion_cache, request_key
+from .http_clients import make_requests_session
 
 class BaseProvider(ABC):
+    # Opt-in exact-match cache, see enableCompletionCache.  Class level because
+    # subclasses set up their attributes without calling super().__init__.
+    completion_cache: Optional[CompletionCache] = None
 
-    @abstractmethod
+    # SDK clients and HTTP session, created on first use and kept so calls
+    # reuse pooled keep-alive connections.  Async clients are per event loop.
+    _client: Any = None
+    _async_clients: Optional["weakref.WeakKeyDictionary"] = None
+    _session: Any = None
+
+    # ----------------------------------------------------------------
+    #  Stateless API: messages in, (text, usage) out.  Nothing on the
+    #  instance is modified, so one provider can serve many threads or
+    #  asyncio tasks at once.
+    # ----------------------------------------------------------------
+    def buildMessages(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        history: Optional[List[dict]] = None,
+    ) -> List[dict]:
+        """Messages for one request: system prompt, optional earlier turns, then the prompt."""
+        return [
+            {"role": "system", "content": system_prompt if system_prompt is not None else self.system_prompt},
+            *(history or []),
+            {"role": "user", "content": prompt},
+        ]
+
+    def complete(self, messages: List[dict]) -> Tuple[str, Optional[Dict[str, int]]]:
+        """
+        Get a completion for `messages`.
+        Returns:
+            (response text, usage dict with input/output/total tokens, or None).
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not implement complete")
+
+    async def acomplete(self, messages: List[dict]) -> Tuple[str, Optional[Dict[str, int]]]:
+        """Async counterpart of complete."""
+        raise NotImplementedError(f"{type(self).__name__} does not implement acomplete")
+
+    def streamComplete(self, messages: List[dict]) -> Iterator[Dict[str, Any]]:
+        """
+        Stream a completion for `messages`.  Yields {"type": "delta", "content": str}
+        items as text arrives, then one {"type": "usage", "usage": dict or None}.
+        Providers without native streaming yield the whole reply as one delta.
+        """
+        response_text, usage = self.complete(messages)
+        yield {"type": "delta", "content": response_text}
+        yield {"type": "usage", "usage": usage}
+
+    async def astreamComplete(self, messages: List[dict]) -> AsyncIterator[Dict[str, Any]]:
+        """Async counterpart of streamComplete, with the same items."""
+        response_text, usage = await self.acomplete(messages)
+        yield {"type": "delta", "content": response_text}
+        yield {"type": "usage", "usage": usage}
+
+    # ----------------------------------------------------------------
+    #  Stateful API: keeps the conversation in self.messages
+    # ----------------------------------------------------------------
     def chatCompletion(self, prompt: str, save_messages: bool = False) -> str:
         """Get a chat completion from the provider."""
-        pass
+        response_text, self.llm_usage = self.complete(self.getMessages(prompt))
+        self.finishReply(response_text, save_messages)
+        return response_text
 
-    @abstractmethod
     async def asyncChatCompletion(self, prompt: str, save_messages: bool = False) -> Any:
         """Get a chat completion asynchronously from the provider."""
-        pass
+        response_text, self.llm_usage = await self.acomplete(self.getMessages(prompt))
+        self.finishReply(response_text, save_messages)
+        return response_text
+
+    def streamChatCompletion(self, prompt: str, save_messages: bool = False) -> Iterator[Dict[str, Any]]:
+        """Stream a chat completion; same items as streamComplete."""
+        chunks = []
+        for item in self.streamComplete(self.getMessages(prompt)):
+            if item["type"] == "delta":
+                chunks.append(item["content"])
+            else:
+                self.llm_usage = item["usage"]
+                self.finishReply("".join(chunks), save_messages)
+            yield item
+
+    async def asyncStreamChatCompletion(self, prompt: str, save_messages: bool = False) -> AsyncIterator[Dict[str, Any]]:
+        """Async counterpart of streamChatCompletion, with the same items."""
+        chunks = []
+        async for item in self.astreamComplete(self.getMessages(prompt)):
+            if item["type"] == "delta":
+                chunks.append(item["content"])
+            else:
+                self.llm_usage = item["usage"]
+                self.finishReply("".join(chunks), save_messages)
+            yield item
 
     @abstractmethod
     def getProviderName(self) -> str:
@@ -60,12 +147,57 @@ class BaseProvider(ABC):
     def setBaseUrl(self, url: str) -> Any:
         """Set the base URL for the provider."""
         self.base_url = url
+        self.resetClients()
         return self
 
     def setAPIKey(self, api_key: str) -> Any:
         """Set the API key for the provider."""
         self.api_key = api_key
+        self.resetClients()
         return self
+
+    def _newClient(self) -> Any:
+        """Build the provider's SDK client; overridden by providers that use one."""
+        raise NotImplementedError(f"{type(self).__name__} has no SDK client")
+
+    def _newAsyncClient(self) -> Any:
+        """Build the provider's async SDK client; overridden by providers that use one."""
+        raise NotImplementedError(f"{type(self).__name__} has no async SDK client")
+
+    def getClient(self) -> Any:
+        """The SDK client, created on first use."""
+        if self._client is None:
+            self._client = self._newClient()
+        return self._client
+
+    def getAsyncClient(self) -> Any:
+        """The async SDK client for the running event loop, created on first use there."""
+        loop = asyncio.get_running_loop()
+        if self._async_clients is None:
+            self._async_clients = weakref.WeakKeyDictionary()
+        client = self._async_clients.get(loop)
+        if client is None:
+            client = self._async_clients[loop] = self._newAsyncClient()
+        return client
+
+    async def acloseAsyncClient(self):
+        """Close the async SDK client of the running event loop, if one was created there."""
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.pop(loop, None) if self._async_clients is not None else None
+        if client is not None:
+            await client.close()
+
+    def getSession(self) -> Any:
+        """requests.Session for raw REST calls, created on first use."""
+        if self._session is None:
+            self._session = make_requests_session()
+        return self._session
+
+    def resetClients(self):
+        """Drop cached clients so the next call picks up a new key or base URL."""
+        self._client = None
+        self._async_clients = None
+        self._session = None
     
     def getModelName(self) -> str:
         """Get the selected model for the provider."""
@@ -91,10 +223,53 @@ class BaseProvider(ABC):
 
         return self.messages
     
+    def finishReply(self, response_text: str, save_messages: bool):
+        """Keep the reply in the history when saving messages, else start over."""
+        if save_messages:
+            self.messages.append({"role": "assistant", "content": response_text})
+        else:
+            self.messages = []
+
     def addAssistantMessage(self, assistant_message: str):
         """Add an assistant message to the conversation history."""
         self.messages.append({"role": "assistant", "content": assistant_message})
 
+    def enableCompletionCache(self, cache: Optional[CompletionCache] = None) -> Any:
+        """
+        Serve repeated identical requests from a cache instead of the API.
+        Only requests with temperature 0 are cached, since only those are
+        expected to give the same answer twice.
+        Args:
+            cache: cache to use; defaults to the process-wide one.
+        """
+        self.completion_cache = cache or get_completion_cache()
+        return self
+
+    def getCachedCompletion(self, messages: List[dict]) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Look up a completion for `messages` with the current settings.
+        Returns:
+            (cache key, cached text): the key is None when the request is
+            not cacheable, the text is None on a miss.
+        """
+        if self.completion_cache is None or self.temperature != 0:
+            return None, None
+        key = request_key(
+            provider=self.getProviderName(),
+            base_url=self.base_url,
+            model=self.model_name,
+            messages=messages,
+            temperature=self.temperature,
+            top_p=self.top_p,
+            max_tokens=self.max_tokens,
+        )
+        return key, self.completion_cache.get(key)
+
+    def saveCachedCompletion(self, key: Optional[str], response_text: str):
+        """Store a completion under the key from getCachedCompletion."""
+        if key is not None and response_text:
+            self.completion_cache.put(key, response_text)
+
     def grounded_search(self, body: str):
         """Gets response from the grounding model completion."""
         pass
\ No newline at end of file
@@ -1,9 +1,10 @@
 from anthropic import Anthropic, AsyncAnthropic
 from configurations import LLMConfigs
-from typing import Any, List
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
 import logging
 from error_utils import ERROR_MESSAGES
 from .base_provider import BaseProvider
+from .http_clients import make_async_http_client, make_http_client
 
 class ClaudeProvider(BaseProvider):
     def __init__(self, api_key: str, **kwargs):
@@ -45,73 +46,91 @@ class ClaudeProvider(BaseProvider):
     def getProviderName(self) -> str:
         return self.provider_name
 
-    def chatCompletion(self, prompt: str, save_messages: bool = False) -> str:
-        messages = self.getMessages(prompt)
-        client = Anthropic(api_key=self.api_key, base_url=self.base_url)
+    def _newClient(self) -> Anthropic:
+        return Anthropic(api_key=self.api_key, base_url=self.base_url, http_client=make_http_client())
 
-        # Convert messages to Anthropic format
-        anthropic_messages = []
-        system_message = None
+    def _newAsyncClient(self) -> AsyncAnthropic:
+        return AsyncAnthropic(api_key=self.api_key, base_url=self.base_url, http_client=make_async_http_client())
 
+    def _requestArgs(self, messages: List[dict]) -> Dict[str, Any]:
+        """Anthropic request arguments, with the system prompt split out of the messages."""
+        system_message = None
+        anthropic_messages = []
         for msg in messages:
             if msg["role"] == "system":
                 system_message = msg["content"]
-            elif msg["role"] == "user":
-                anthropic_messages.append({"role": "user", "content": msg["content"]})
-            elif msg["role"] == "assistant":
-                anthropic_messages.append({"role": "assistant", "content": msg["content"]})
-
-        response = client.messages.create(
-            model=self.model_name,
-            max_tokens=self.max_tokens,
-            temperature=self.temperature,
-            top_p=self.top_p,
-            system=system_message,
-            messages=anthropic_messages
-        )
-
-        response_text = response.content[0].text if response.content else ""
-
-        if save_messages:
-            self.messages.append({"role": "assistant", "content": response_text})
-        else:
-            self.messages = []
-
-        return response_text
-
-    async def asyncChatCompletion(self, prompt: str, save_messages: bool = False) -> Any:
-        messages = self.getMessages(prompt)
-        client = AsyncAnthropic(api_key=self.api_key, base_url=self.base_url)
+            elif msg["role"] in ("user", "assistant"):
+                anthropic_messages.append({"role": msg["role"], "content": msg["content"]})
+        return {
+            "model": self.model_name,
+            "max_tokens": self.max_tokens,
+            "temperature": self.temperature,
+            "top_p": self.top_p,
+            "system": system_message,
+            "messages": anthropic_messages,
+        }
 
-        # Convert messages to Anthropic format
-        anthropic_messages = []
-        system_message = None
+    @staticmethod
+    def _usage(usage) -> Dict[str, int]:
+        return {
+            "input_tokens": usage.input_tokens,
+            "output_tokens": usage.output_tokens,
+            "total_tokens": usage.input_tokens + usage.output_tokens,
+        }
 
-        for msg in messages:
-            if msg["role"] == "system":
-                system_message = msg["content"]
-            elif msg["role"] == "user":
-                anthropic_messages.append({"role": "user", "content": msg["content"]})
-            elif msg["role"] == "assistant":
-                anthropic_messages.append({"role": "assistant", "content": msg["content"]})
-
-        response = await client.messages.create(
-            model=self.model_name,
-            max_tokens=self.max_tokens,
-            temperature=self.temperature,
-            top_p=self.top_p,
-            system=system_message,
-            messages=anthropic_messages
-        )
+    def complete(self, messages: List[dict]) -> Tuple[str, Optional[Dict[str, int]]]:
+        cache_key, response_text = self.getCachedCompletion(messages)
+        if response_text is not None:
+            return response_text, None
 
+        response = self.getClient().messages.create(**self._requestArgs(messages))
         response_text = response.content[0].text if response.content else ""
+        self.saveCachedCompletion(cache_key, response_text)
+        return response_text, self._usage(response.usage)
 
-        if save_messages:
-            self.messages.append({"role": "assistant", "content": response_text})
-        else:
-            self.messages = []
+    async def acomplete(self, messages: List[dict]) -> Tuple[str, Optional[Dict[str, int]]]:
+        cache_key, response_text = self.getCachedCompletion(messages)
+        if response_text is not None:
+            return response_text, None
 
-        return response_text
+        response = await self.getAsyncClient().messages.create(**self._requestArgs(messages))
+        response_text = response.content[0].text if response.content else ""
+        self.saveCachedCompletion(cache_key, response_text)
+        return response_text, self._usage(response.usage)
+
+    def streamComplete(self, messages: List[dict]) -> Iterator[Dict[str, Any]]:
+        cache_key, response_text = self.getCachedCompletion(messages)
+        if response_text is not None:
+            yield {"type": "delta", "content": response_text}
+            yield {"type": "usage", "usage": None}
+            return
+
+        chunks = []
+        with self.getClient().messages.stream(**self._requestArgs(messages)) as stream:
+            for text in stream.text_stream:
+                chunks.append(text)
+                yield {"type": "delta", "content": text}
+            usage = self._usage(stream.get_final_message().usage)
+
+        self.saveCachedCompletion(cache_key, "".join(chunks))
+        yield {"type": "usage", "usage": usage}
+
+    async def astreamComplete(self, messages: List[dict]) -> AsyncIterator[Dict[str, Any]]:
+        cache_key, response_text = self.getCachedCompletion(messages)
+        if response_text is not None:
+            yield {"type": "delta", "content": response_text}
+            yield {"type": "usage", "usage": None}
+            return
+
+        chunks = []
+        async with self.getAsyncClient().messages.stream(**self._requestArgs(messages)) as stream:
+            async for text in stream.text_stream:
+                chunks.append(text)
+                yield {"type": "delta", "content": text}
+            usage = self._usage((await stream.get_final_message()).usage)
+
+        self.saveCachedCompletion(cache_key, "".join(chunks))
+        yield {"type": "usage", "usage": usage}
 
     def grounded_search(self, payload):
         self.isGrounding = True
@@ -0,0 +1,144 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+# The disk store is trimmed to this share of max_disk_entries, so the
+# COUNT(*) that confirms an overflow runs once per batch of evictions.
+EVICT_TO = 0.9
+
+
+def request_key(**request: Any) -> str:
+    """
+    Canonical hash of a completion request: the same provider, model,
+    messages and sampling settings always give the same key.
+    """
+    canonical = json.dumps(request, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class CompletionCache:
+    """
+    Exact-match cache of completion texts: an in-memory LRU of
+    `max_entries`, backed by an optional SQLite file so entries survive
+    restarts and are shared by the workers of one host.  The disk row
+    count is tracked in memory and re-read only when it passes the limit.
+    """
+
+    def __init__(self, max_entries: int = 1024, path: Optional[str] = None, max_disk_entries: int = 100_000):
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.path = path
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        self._conn = None
+        self._disk_count = 0
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            with self._lock, self._conn:
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS completions ("
+                    "key TEXT PRIMARY KEY, response TEXT NOT NULL, last_used REAL NOT NULL)"
+                )
+                self._conn.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_completions_last_used ON completions (last_used)"
+                )
+                (self._disk_count,) = self._conn.execute("SELECT COUNT(*) FROM completions").fetchone()
+
+    def get(self, key: str) -> Optional[str]:
+        """Cached completion for `key`, or None."""
+        with self._lock:
+            response = self._entries.get(key)
+            if response is not None:
+                self._entries.move_to_end(key)
+            elif self._conn is not None:
+                with self._conn:
+                    row = self._conn.execute("SELECT response FROM completions WHERE key = ?", (key,)).fetchone()
+                    if row is not None:
+                        response = row[0]
+                        self._conn.execute("UPDATE completions SET last_used = ? WHERE key = ?", (time.time(), key))
+                        self._remember(key, response)
+
+            if response is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return response
+
+    def put(self, key: str, response: str):
+        """Store a completion in memory and, when configured, on disk."""
+        with self._lock:
+            self._remember(key, response)
+            if self._conn is None:
+                return
+            now = time.time()
+            with self._conn:
+                inserted = self._conn.execute(
+                    "INSERT OR IGNORE INTO completions (key, response, last_used) VALUES (?, ?, ?)",
+                    (key, response, now),
+                ).rowcount
+                if not inserted:
+                    self._conn.execute(
+                        "UPDATE completions SET response = ?, last_used = ? WHERE key = ?",
+                        (response, now, key),
+                    )
+                self._disk_count += inserted
+                if self._disk_count > self.max_disk_entries:
+                    self._evict()
+
+    def _evict(self):
+        """Trim the disk store to EVICT_TO of `max_disk_entries`, least recently used first."""
+        # Other workers may share the file, so recount before deleting.
+        (self._disk_count,) = self._conn.execute("SELECT COUNT(*) FROM completions").fetchone()
+        if self._disk_count <= self.max_disk_entries:
+            return
+        overflow = self._disk_count - int(self.max_disk_entries * EVICT_TO)
+        self._conn.execute(
+            "DELETE FROM completions WHERE rowid IN "
+            "(SELECT rowid FROM completions ORDER BY last_used ASC LIMIT ?)",
+            (overflow,),
+        )
+        self._disk_count -= overflow
+
+    def _remember(self, key: str, response: str):
+        self._entries[key] = response
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters and the in-memory size."""
+        with self._lock:
+            return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+_default_cache: Optional[CompletionCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_completion_cache() -> CompletionCache:
+    """
+    Return the process-wide cache configured from the environment.
+    COMPLETION_CACHE_MAX_ENTRIES bounds the in-memory LRU and
+    COMPLETION_CACHE_PATH, when set, adds the SQLite store.
+    """
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            path = os.getenv("COMPLETION_CACHE_PATH") or None
+            _default_cache = CompletionCache(
+                max_entries=int(os.getenv("COMPLETION_CACHE_MAX_ENTRIES", 1024)),
+                path=path,
+            )
+            logging.info(f"Completion cache enabled (disk store: {path or 'none'})")
+    return _default_cache
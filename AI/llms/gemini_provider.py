@@ -1,7 +1,7 @@
 from error_utils import ERROR_MESSAGES
 from .openai_provider import OpenAIProvider
 from configurations import LLMConfigs
-import requests
+from .http_clients import requests_timeout
 import logging
 import json
 from pydantic import BaseModel
@@ -75,10 +75,11 @@ class GeminiProvider(OpenAIProvider):
                     
                 request_body["contents"][0]["parts"][0]['text'] += f"\n\nFormat: {output_format}\nRules: {base_instruction}{date_rule}"
                 
-            req = requests.post(
+            req = self.getSession().post(
                 url=self.base_url,
                 headers={"x-goog-api-key": self.api_key},
-                json=request_body
+                json=request_body,
+                timeout=requests_timeout(),
             )
             
             try:
@@ -0,0 +1,56 @@
+import importlib.util
+import os
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+
+def http2_available() -> bool:
+    """HTTP/2 needs the optional `h2` package (pip install httpx[http2])."""
+    return importlib.util.find_spec("h2") is not None
+
+
+def http_timeout() -> httpx.Timeout:
+    """Request timeout from LLM_HTTP_TIMEOUT, connect timeout from LLM_HTTP_CONNECT_TIMEOUT (seconds)."""
+    return httpx.Timeout(
+        float(os.getenv("LLM_HTTP_TIMEOUT", 120)),
+        connect=float(os.getenv("LLM_HTTP_CONNECT_TIMEOUT", 10)),
+    )
+
+
+def http_limits() -> httpx.Limits:
+    """Connection pool limits from LLM_HTTP_MAX_CONNECTIONS, LLM_HTTP_MAX_KEEPALIVE and LLM_HTTP_KEEPALIVE_EXPIRY."""
+    return httpx.Limits(
+        max_connections=int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", 100)),
+        max_keepalive_connections=int(os.getenv("LLM_HTTP_MAX_KEEPALIVE", 20)),
+        keepalive_expiry=float(os.getenv("LLM_HTTP_KEEPALIVE_EXPIRY", 30)),
+    )
+
+
+def make_http_client() -> httpx.Client:
+    """Keep-alive httpx client for the provider SDKs, on HTTP/2 when available."""
+    return httpx.Client(limits=http_limits(), timeout=http_timeout(), http2=http2_available())
+
+
+def make_async_http_client() -> httpx.AsyncClient:
+    """Async counterpart of make_http_client; bound to the event loop it is first used on."""
+    return httpx.AsyncClient(limits=http_limits(), timeout=http_timeout(), http2=http2_available())
+
+
+def make_requests_session() -> requests.Session:
+    """requests.Session whose pool size follows LLM_HTTP_MAX_KEEPALIVE, for the raw REST calls."""
+    pool_size = int(os.getenv("LLM_HTTP_MAX_KEEPALIVE", 20))
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def requests_timeout() -> tuple:
+    """(connect, read) timeout for requests calls, from the same settings as http_timeout."""
+    return (
+        float(os.getenv("LLM_HTTP_CONNECT_TIMEOUT", 10)),
+        float(os.getenv("LLM_HTTP_TIMEOUT", 120)),
+    )
@@ -1,8 +1,13 @@
 from __future__ import annotations
 
+import asyncio
 import dataclasses
 import json
+import logging
+import os
 import re
+import threading
+import weakref
 from typing import Any, Iterator, Sequence
 
 import langextract as lx
@@ -11,6 +16,7 @@ from langextract.core.types import ScoredOutput
 import langextract.resolver as resolver
 
 from .langextract_schema import CustomProviderSchema
+from .rate_limit import get_rate_limiter
 
 def patched_extract_and_parse_content(self, input_string: str) -> dict[str, Any]:
     """
@@ -32,6 +38,17 @@ def patched_extract_and_parse_content(self, input_string: str) -> dict[str, Any]
 
 resolver.Resolver._extract_and_parse_content = patched_extract_and_parse_content
 
+def _stop_loop(loop: asyncio.AbstractEventLoop, thread: threading.Thread, provider: Any) -> None:
+    """Close the provider's async client on `loop`, then stop the loop and its thread."""
+    if provider is not None:
+        try:
+            asyncio.run_coroutine_threadsafe(provider.acloseAsyncClient(), loop).result()
+        except Exception as e:
+            logging.warning(f"Failed to close the async client of {provider.getProviderName()}: {e}")
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.close()
+
 @lx.providers.registry.register(r"^opai")
 @dataclasses.dataclass(init=False)
 class CustomOPProvider(BaseLanguageModel):
@@ -82,8 +99,22 @@ class CustomOPProvider(BaseLanguageModel):
         self.enable_structured_output = kwargs.get(
             "enable_structured_output", False
         )
+        # LangExtract re-sends identical chunks; at temperature 0 those are
+        # answered from the completion cache.
+        self.use_completion_cache = kwargs.get("use_completion_cache", True)
+        # Prompts of one batch sent at the same time; 1 keeps the old
+        # one-at-a-time behaviour.
+        self.max_concurrency = int(
+            kwargs.get("max_concurrency")
+            or os.getenv("LANGEXTRACT_MAX_CONCURRENCY", 8)
+        )
 
         self._provider = None
+        # Batches run on one event loop kept on a background thread, so
+        # the provider's async client and its connections are reused.
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._loop_lock = threading.Lock()
+        self._finalizer: weakref.finalize | None = None
 
     @classmethod
     def get_schema_class(cls) -> type[lx.schema.BaseSchema] | None:
@@ -101,24 +132,139 @@ class CustomOPProvider(BaseLanguageModel):
             self.response_schema = None
             self.enable_structured_output = False
 
-    def chat(self, prompt: str, system_prompt: str = None):
-        """Simple chat method for LangExtract integration."""
-        from .provider_factory import ProviderFactory
-        
+    def _get_provider(self, provider_name: str | None = None):
+        """Create the underlying provider on first use."""
         if self._provider is None:
-            factory = ProviderFactory()
-            self._provider = factory.get_provider_instance(
-                provider_name=self.llm_provider,
+            from .provider_factory import get_provider_factory
+            self._provider = get_provider_factory().get_provider_instance(
+                provider_name=provider_name or self.llm_provider,
                 api_key=self.api_key,
                 model=self.model_id,
                 base_url=self.base_url,
                 temperature=self.temperature
             )
-        
-        if system_prompt:
-            self._provider.setSystemPrompt(system_prompt)
-        
-        return self._provider.chatCompletion(prompt)
+            if self.use_completion_cache:
+                self._provider.enableCompletionCache()
+        return self._provider
+
+    def chat(self, prompt: str, system_prompt: str = None):
+        """Simple chat method for LangExtract integration."""
+        provider = self._get_provider()
+
+        limiter = get_rate_limiter(provider.getProviderName())
+        if limiter is not None:
+            limiter.wait()
+
+        # Stateless call: nothing is stored on the shared provider.
+        response_text, _ = provider.complete(provider.buildMessages(prompt, system_prompt))
+        return response_text
+
+    async def _achat_batch(self, prompts: Sequence[str], system_prompt: str) -> list[str]:
+        """
+        Send every prompt through acomplete, at most
+        `max_concurrency` at a time and within the provider's rate limit.
+        Results are in the order of `prompts`.  The first failure cancels
+        the rest of the batch and is raised.
+        """
+        provider = self._get_provider()
+        limiter = get_rate_limiter(provider.getProviderName())
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def run(prompt: str) -> str:
+            # Every task shares the one provider (and its connection pool);
+            # acomplete keeps no per-request state on it.
+            async with semaphore:
+                if limiter is not None:
+                    await limiter.async_wait()
+                response_text, _ = await provider.acomplete(provider.buildMessages(prompt, system_prompt))
+                return response_text
+
+        try:
+            async with asyncio.TaskGroup() as group:
+                tasks = [group.create_task(run(prompt)) for prompt in prompts]
+        except ExceptionGroup as errors:
+            # The other requests are already cancelled; report the failure itself.
+            raise errors.exceptions[0]
+        return [task.result() for task in tasks]
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        """Start the background event loop on first use."""
+        with self._loop_lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(
+                    target=loop.run_forever, name="langextract-loop", daemon=True
+                )
+                thread.start()
+                self._loop = loop
+                # Also runs at interpreter exit, or when the model is garbage collected.
+                self._finalizer = weakref.finalize(
+                    self, _stop_loop, loop, thread, self._get_provider()
+                )
+            return self._loop
+
+    def _run_batch(self, prompts: Sequence[str], system_prompt: str) -> list[str]:
+        """
+        Run _achat_batch to completion from synchronous code, also from
+        inside another event loop (e.g. an agent tool).
+        """
+        future = asyncio.run_coroutine_threadsafe(
+            self._achat_batch(prompts, system_prompt), self._get_loop()
+        )
+        return future.result()
+
+    def close(self) -> None:
+        """Close the provider's async client and stop the background loop."""
+        with self._loop_lock:
+            finalizer, self._finalizer, self._loop = self._finalizer, None, None
+        if finalizer is not None:
+            finalizer()
+
+    @staticmethod
+    def _to_scored_output(raw_output: str) -> list[ScoredOutput]:
+        """Normalise a raw reply into the marker-wrapped JSON LangExtract parses."""
+        raw_output = (
+            raw_output.replace("```json", "")
+                      .replace("```", "")
+                      .strip()
+        )
+
+        match = re.search(
+            r"<\|EXTRACT_START\|>(.*?)<\|EXTRACT_END\|>",
+            raw_output,
+            re.DOTALL,
+        )
+
+        json_text = match.group(1).strip() if match else "{}"
+
+        try:
+            json_data = json.loads(json_text)
+        except json.JSONDecodeError:
+            json_data = {"extractions": []}
+
+        extractions = json_data.get("extractions", [])
+
+        if not isinstance(extractions, list):
+            extractions = [
+                {
+                    "extraction_class": k,
+                    "extraction_text": v,
+                    "attributes": {},
+                }
+                for k, v in json_data.items()
+            ]
+
+        final_output = (
+            "<|EXTRACT_START|>\n"
+            + json.dumps(
+                {"extractions": extractions},
+                indent=2,
+                ensure_ascii=False,
+            )
+            + "\n<|EXTRACT_END|>"
+        )
+
+        return [ScoredOutput(output=final_output, score=1.0)]
 
     def infer(
         self,
@@ -134,18 +280,21 @@ class CustomOPProvider(BaseLanguageModel):
 
         system_prompt = "You are a strict json field extraction model"
 
-        if self._provider is None:
-            from .provider_factory import ProviderFactory
-            factory = ProviderFactory()
-            self._provider = factory.get_provider_instance(
-                provider_name=provider_name,
-                api_key=self.api_key,
-                model=self.model_id,
-                base_url=self.base_url,
-                temperature=self.temperature
-            )
+        self._get_provider(provider_name)
+
+        if self.max_concurrency > 1 and len(batch_prompts) > 1:
+            # The batch takes as long as its slowest prompt, not the sum of all.
+            try:
+                raw_outputs = self._run_batch(batch_prompts, system_prompt)
+            except Exception as e:
+                raise lx.exceptions.InferenceRuntimeError(
+                    f"LLM error: {str(e)}",
+                    original=e,
+                ) from e
 
-        provider = self._provider
+            for raw_output in raw_outputs:
+                yield self._to_scored_output(raw_output or "")
+            return
 
         for prompt in batch_prompts:
             try:
@@ -153,52 +302,10 @@ class CustomOPProvider(BaseLanguageModel):
                     prompt=prompt,
                     system_prompt=system_prompt,
                 )
-
-                raw_output = (
-                    raw_output.replace("```json", "")
-                              .replace("```", "")
-                              .strip()
-                )
-
-                match = re.search(
-                    r"<\|EXTRACT_START\|>(.*?)<\|EXTRACT_END\|>",
-                    raw_output,
-                    re.DOTALL,
-                )
-
-                json_text = match.group(1).strip() if match else "{}"
-
-                try:
-                    json_data = json.loads(json_text)
-                except json.JSONDecodeError:
-                    json_data = {"extractions": []}
-
-                extractions = json_data.get("extractions", [])
-
-                if not isinstance(extractions, list):
-                    extractions = [
-                        {
-                            "extraction_class": k,
-                            "extraction_text": v,
-                            "attributes": {},
-                        }
-                        for k, v in json_data.items()
-                    ]
-
-                final_output = (
-                    "<|EXTRACT_START|>\n"
-                    + json.dumps(
-                        {"extractions": extractions},
-                        indent=2,
-                        ensure_ascii=False,
-                    )
-                    + "\n<|EXTRACT_END|>"
-                )
-
-                yield [ScoredOutput(output=final_output, score=1.0)]
+                yield self._to_scored_output(raw_output)
 
             except Exception as e:
                 raise lx.exceptions.InferenceRuntimeError(
                     f"LLM error: {str(e)}",
                     original=e,
-                ) from e
\ No newline at end of file
+                ) from e
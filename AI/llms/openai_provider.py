@@ -1,11 +1,12 @@
 from openai import OpenAI, AsyncOpenAI
 from configurations import LLMConfigs
-from typing import Any, List
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
 import logging
 import json
 from pydantic import BaseModel
 from error_utils import ERROR_MESSAGES
 from .base_provider import BaseProvider
+from .http_clients import make_async_http_client, make_http_client
 
 class OpenAIProvider(BaseProvider):
     def __init__(self, api_key: str, **kwargs):
@@ -47,52 +48,115 @@ class OpenAIProvider(BaseProvider):
     
     def getProviderName(self) -> str:
         return self.provider_name
+
+    def _newClient(self) -> OpenAI:
+        return OpenAI(api_key=self.api_key, base_url=self.base_url, http_client=make_http_client())
+
+    def _newAsyncClient(self) -> AsyncOpenAI:
+        return AsyncOpenAI(api_key=self.api_key, base_url=self.base_url, http_client=make_async_http_client())
     
-    def chatCompletion(self, prompt: str, save_messages: bool = False) -> str:
-        messages = self.getMessages(prompt)
-        client = OpenAI(api_key=self.api_key, base_url=self.base_url)
-        response = client.chat.completions.create(
+    @staticmethod
+    def _usage(usage) -> Optional[Dict[str, int]]:
+        if usage is None:
+            return None
+        return {
+            "input_tokens": usage.prompt_tokens,
+            "output_tokens": usage.completion_tokens,
+            "total_tokens": usage.total_tokens,
+        }
+
+    @staticmethod
+    def _responseText(response) -> str:
+        if response.choices[0].message is not None:
+            return response.choices[0].message.content or ""
+        return ""
+
+    def complete(self, messages: List[dict]) -> Tuple[str, Optional[Dict[str, int]]]:
+        cache_key, response_text = self.getCachedCompletion(messages)
+        if response_text is not None:
+            return response_text, None
+
+        response = self.getClient().chat.completions.create(
             model=self.model_name,
             temperature=self.temperature,
             top_p=self.top_p,
             max_completion_tokens=self.max_tokens,
             messages=messages
         )
+        response_text = self._responseText(response)
+        self.saveCachedCompletion(cache_key, response_text)
+        return response_text, self._usage(response.usage)
 
-        if response.choices[0].message is not None:
-            response_text = response.choices[0].message.content
-        else:
-            response_text = "" 
-
-        if save_messages:
-            self.messages.append({"role": "assistant", "content": response_text})
-        else:
-            self.messages = []
+    async def acomplete(self, messages: List[dict]) -> Tuple[str, Optional[Dict[str, int]]]:
+        cache_key, response_text = self.getCachedCompletion(messages)
+        if response_text is not None:
+            return response_text, None
 
-        return response_text
-    
-    async def asyncChatCompletion(self, prompt: str, save_messages: bool = False) -> Any:
-        messages = self.getMessages(prompt)
-        client = AsyncOpenAI(api_key=self.api_key, base_url=self.base_url)
-        response = await client.chat.completions.create(
+        response = await self.getAsyncClient().chat.completions.create(
             model=self.model_name,
             temperature=self.temperature,
             top_p=self.top_p,
             max_tokens=self.max_tokens,
             messages=messages
         )
+        response_text = self._responseText(response)
+        self.saveCachedCompletion(cache_key, response_text)
+        return response_text, self._usage(response.usage)
 
-        if response.choices[0].message is not None:
-            response_text = response.choices[0].message.content
-        else:
-            response_text = ""
+    def streamComplete(self, messages: List[dict]) -> Iterator[Dict[str, Any]]:
+        cache_key, response_text = self.getCachedCompletion(messages)
+        if response_text is not None:
+            yield {"type": "delta", "content": response_text}
+            yield {"type": "usage", "usage": None}
+            return
 
-        if save_messages:
-            self.messages.append({"role": "assistant", "content": response_text})
-        else:
-            self.messages = []
+        chunks, usage = [], None
+        stream = self.getClient().chat.completions.create(
+            model=self.model_name,
+            temperature=self.temperature,
+            top_p=self.top_p,
+            max_completion_tokens=self.max_tokens,
+            messages=messages,
+            stream=True,
+            # The last chunk then carries the token usage.
+            stream_options={"include_usage": True}
+        )
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                chunks.append(chunk.choices[0].delta.content)
+                yield {"type": "delta", "content": chunk.choices[0].delta.content}
+            if getattr(chunk, "usage", None) is not None:
+                usage = self._usage(chunk.usage)
+
+        self.saveCachedCompletion(cache_key, "".join(chunks))
+        yield {"type": "usage", "usage": usage}
+
+    async def astreamComplete(self, messages: List[dict]) -> AsyncIterator[Dict[str, Any]]:
+        cache_key, response_text = self.getCachedCompletion(messages)
+        if response_text is not None:
+            yield {"type": "delta", "content": response_text}
+            yield {"type": "usage", "usage": None}
+            return
+
+        chunks, usage = [], None
+        stream = await self.getAsyncClient().chat.completions.create(
+            model=self.model_name,
+            temperature=self.temperature,
+            top_p=self.top_p,
+            max_tokens=self.max_tokens,
+            messages=messages,
+            stream=True,
+            stream_options={"include_usage": True}
+        )
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                chunks.append(chunk.choices[0].delta.content)
+                yield {"type": "delta", "content": chunk.choices[0].delta.content}
+            if getattr(chunk, "usage", None) is not None:
+                usage = self._usage(chunk.usage)
 
-        return response_text
+        self.saveCachedCompletion(cache_key, "".join(chunks))
+        yield {"type": "usage", "usage": usage}
 
     def grounded_search(self, payload):
         self.isGrounding = True
@@ -121,8 +185,7 @@ class OpenAIProvider(BaseProvider):
                 output_format = BaseModel(output_format, "DynamicModel")
                 request_body["text_format"] = output_format
 
-            client = OpenAI(api_key=self.api_key)
-            response = client.responses.parse(**request_body)
+            response = self.getClient().responses.parse(**request_body)
             
             message = None
             citations = []
@@ -1,6 +1,6 @@
 from .openai_provider import OpenAIProvider
 from configurations import LLMConfigs
-import requests
+from .http_clients import requests_timeout
 import logging
 import json
 from error_utils import ERROR_MESSAGES
@@ -64,10 +64,11 @@ class PerplexityProvider(OpenAIProvider):
                     "json_schema": {"schema": output_format},
                 }
                 
-            req = requests.post(
+            req = self.getSession().post(
                 url=self.base_url + "/chat/completions",
                 headers={"Authorization": f"Bearer {self.api_key}"},
-                json=request_body
+                json=request_body,
+                timeout=requests_timeout(),
             )
             
             if req.status_code != 200:
@@ -1,89 +1,101 @@
-# import all the llms in this module
-from .base_provider import BaseProvider
+import importlib
+import threading
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Type
 
-from typing import List, Dict, Any
+from configurations import LLMConfigs
+
+if TYPE_CHECKING:
+    from .base_provider import BaseProvider
+
+# Static provider metadata.  Listing providers, models and configs reads
+# only this table and LLMConfigs; a provider's module (and its SDK) is
+# imported the first time an instance of it is requested.
+PROVIDER_REGISTRY: Dict[str, Dict[str, str]] = {
+    "openai": {
+        "module": ".openai_provider",
+        "class": "OpenAIProvider",
+        "base_url": "https://api.openai.com/v1",
+    },
+    "perplexity": {
+        "module": ".perplexity_provider",
+        "class": "PerplexityProvider",
+        "base_url": "https://api.perplexity.ai",
+    },
+    "gemini": {
+        "module": ".gemini_provider",
+        "class": "GeminiProvider",
+        "base_url": "https://generativelanguage.googleapis.com/v1beta/openai/",
+    },
+    "groq": {
+        "module": ".groq_provider",
+        "class": "GroqProvider",
+        "base_url": "https://api.groq.com/openai/v1",
+    },
+    "mistral": {
+        "module": ".mistral_provider",
+        "class": "MistralProvider",
+        "base_url": "https://api.mistral.ai/v1",
+    },
+    "ollama": {
+        "module": ".ollama_provider",
+        "class": "OllamaProvider",
+        "base_url": "http://localhost:11434",
+    },
+    "claude": {
+        "module": ".claude_provider",
+        "class": "ClaudeProvider",
+        "base_url": "https://api.anthropic.com",
+    },
+}
+
+# Every provider accepts the same settings.
+PROVIDER_CONFIG: Dict[str, str] = {
+    "model": "string",
+    "api_key": "string",
+    "temperature": "float",
+    "top_p": "float",
+    "max_tokens": "int",
+    "system_prompt": "string",
+}
 
-import importlib
-import pkgutil
-from pathlib import Path
 
 class ProviderFactory:
     '''
     This is a factory class that is used to create instances of a provider.
+    Use `get_provider_factory()` for the shared instance.
     '''
     def __init__(self):
         '''
-        Initializes the factory class by loading all the provider classes and instantiating them.
+        Initializes the factory from the static registry; no provider module is imported here.
         '''
-        self.top_module = ''
-        self.provider_classes : Dict[str, BaseProvider] = self._load_provider_classes()
-        self.all_providers : List[Dict[str, Any]] = self._instantiate_providers()
-        
+        self._classes: Dict[str, Type["BaseProvider"]] = {}
+        self._lock = threading.Lock()
 
-    def _load_provider_classes(self) -> Dict[str, BaseProvider]:
-        '''
-        Load all provider classes from the providers folder.
-        '''
-        # Use __file__ to get the directory of the current script
-        factory_dir = Path(__file__).parent
-        modules = self._find_modules_in_folder(factory_dir)
-
-        # Collect all classes that inherit from BaseProvider
-        provider_classes = {}
-        # Iterate through all modules
-        for module_name in modules:
-            classes = self._load_classes_from_module(module_name)
-            for cls in classes:
-                # Store the class in the provider_classes dictionary
-                provider_classes[cls.__name__] = cls
-        return provider_classes
-
-    def _find_modules_in_folder(self, folder_path):
-        '''
-        Find all modules in the folder.
-        '''
-        modules = []
-        for _, module_name, _ in pkgutil.iter_modules([str(folder_path)]):
-            # Use the full module path (e.g., "folder.provider_a")
-            modules.append(f"{folder_path.name}.{module_name}")
-        return modules
+    def _provider_name(self, provider_name: str) -> str:
+        name = provider_name.lower()
+        if name not in PROVIDER_REGISTRY:
+            raise ValueError(f"Provider {provider_name} not found")
+        return name
 
-    def _load_classes_from_module(self, module_name) -> List[BaseProvider]:
-        '''
-        Load all classes from the module that inherit from BaseProvider.
-        '''
-        
-        module_path = self.top_module + module_name
-        module = importlib.import_module(module_path)
-        classes = []
-        for name, obj in module.__dict__.items():
-            # Check if the object is a class and inherits from BaseProvider
-            if isinstance(obj, type) and issubclass(obj, BaseProvider) and obj is not BaseProvider:
-                classes.append(obj)
-        return classes
-    
-    def _instantiate_providers(self) -> List[Dict[str, Any]]:
-        '''
-        Instantiate all provider classes to extract the provider name, models, and config.
-        Returns a list of dictionaries containing the provider name, class, models, and config.
+    def get_provider_class(self, provider_name: str) -> Type["BaseProvider"]:
         '''
-        all_providers = []
-        # Iterate through all provider classes
-        for cls_name, cls in self.provider_classes.items():
-            # Instantiate the provider
-            provider_instance = cls(('fake_key'), **{'model': 'fake_model'})
-            # store a dict of values to the all_providers list
-            all_providers.append({
-                    'provider_name': provider_instance.getProviderName(), 
-                    'cls': cls,
-                    'models': provider_instance.getModels(),
-                    'config': provider_instance.getConfig(),
-                    'base_url': provider_instance.getBaseUrl()
-                    })
-        return all_providers
-    
-
-    def get_provider_instance(self, **kwargs) -> BaseProvider:
+        Import the provider's module on first use and return its class.
+        Args:
+            provider_name: The name of the provider.
+        Returns:
+            The provider class.
+        '''
+        name = self._provider_name(provider_name)
+        cls = self._classes.get(name)
+        if cls is None:
+            entry = PROVIDER_REGISTRY[name]
+            module = importlib.import_module(entry["module"], __package__)
+            cls = getattr(module, entry["class"])
+            with self._lock:
+                self._classes[name] = cls
+        return cls
+
+    def get_provider_instance(self, **kwargs) -> "BaseProvider":
         '''
         Get the provider instance by provider_name or base_url.
         Args:
@@ -96,11 +108,11 @@ class ProviderFactory:
         provider_name = kwargs.get("provider_name", None)
         base_url = kwargs.get("base_url", None)
 
-        for provider in self.all_providers:
-            if base_url is not None and provider["base_url"] == base_url:
-                return provider["cls"](**kwargs)
-            if provider_name is not None and provider["provider_name"] == provider_name.lower():
-                return provider["cls"](**kwargs)
+        for name, entry in PROVIDER_REGISTRY.items():
+            if base_url is not None and entry["base_url"] == base_url:
+                return self.get_provider_class(name)(**kwargs)
+        if provider_name is not None and provider_name.lower() in PROVIDER_REGISTRY:
+            return self.get_provider_class(provider_name)(**kwargs)
         raise ValueError("Provider not found")
 
     def get_all_providers_names(self) -> List[str]:
@@ -109,8 +121,8 @@ class ProviderFactory:
         Returns:
             A list of provider names.
         '''
-        return [provider['provider_name'] for provider in self.all_providers] 
-        
+        return list(PROVIDER_REGISTRY)
+
     def get_config_for_provider(self, provider_name) -> dict:
         '''
         Get the config for a given provider.
@@ -119,11 +131,9 @@ class ProviderFactory:
             Returns:
                 The config for the provider.
         '''
-        for provider in self.all_providers:
-            if provider['provider_name'] == provider_name:
-                return provider['config']
-        raise ValueError(f"Provider {provider_name} not found")
-    
+        self._provider_name(provider_name)
+        return dict(PROVIDER_CONFIG)
+
     def get_all_models_for_provider(self, provider_name) -> List[str]:
         '''
         Get all models for a given provider.
@@ -132,15 +142,39 @@ class ProviderFactory:
         Returns:
             A list of models for the provider.
         '''
-        for provider in self.all_providers:
-            if provider['provider_name'] == provider_name:
-                return provider['models']
-        raise ValueError(f"Provider {provider_name} not found")
+        name = self._provider_name(provider_name)
+        return [model["value"] for model in LLMConfigs.get(name, {}).get("models", [])]
 
     def get_all_providers(self) -> List[Dict[str, Any]]:
         '''
-        Get all providers.
+        Get all providers.  This imports every provider module, since the
+        result includes the classes.
         Returns:
             A list of dictionaries containing the provider name, class, models, and config.
         '''
-        return self.all_providers
\ No newline at end of file
+        return [
+            {
+                'provider_name': name,
+                'cls': self.get_provider_class(name),
+                'models': self.get_all_models_for_provider(name),
+                'config': self.get_config_for_provider(name),
+                'base_url': entry['base_url'],
+            }
+            for name, entry in PROVIDER_REGISTRY.items()
+        ]
+
+
+_factory: Optional[ProviderFactory] = None
+_factory_lock = threading.Lock()
+
+
+def get_provider_factory() -> ProviderFactory:
+    '''
+    Return the process-wide factory, creating it on first use.
+    '''
+    global _factory
+    if _factory is None:
+        with _factory_lock:
+            if _factory is None:
+                _factory = ProviderFactory()
+    return _factory
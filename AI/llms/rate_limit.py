@@ -0,0 +1,61 @@
+import asyncio
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+
+class RateLimiter:
+    """
+    Spaces requests evenly at `requests_per_minute`.  Slots are handed out
+    under a thread lock, so one limiter can be shared by threads and by
+    different event loops; callers only sleep until their slot.
+    """
+
+    def __init__(self, requests_per_minute: float):
+        self.interval = 60.0 / requests_per_minute
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Take the next free slot and return how long to wait for it."""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+            return slot - now
+
+    def wait(self):
+        """Block until this caller may send a request."""
+        delay = self._reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    async def async_wait(self):
+        """Sleep, without blocking the event loop, until this caller may send a request."""
+        delay = self._reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+_limiters: Dict[str, Optional[RateLimiter]] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(provider_name: str) -> Optional[RateLimiter]:
+    """
+    Process-wide limiter for a provider, or None when it is not limited.
+    The rate comes from LLM_RATE_LIMIT_RPM_<PROVIDER> (e.g.
+    LLM_RATE_LIMIT_RPM_OPENAI), falling back to LLM_RATE_LIMIT_RPM; 0 or
+    unset means no limit.
+    """
+    provider_name = provider_name.lower()
+    with _limiters_lock:
+        if provider_name not in _limiters:
+            rpm = float(
+                os.getenv(f"LLM_RATE_LIMIT_RPM_{provider_name.upper()}")
+                or os.getenv("LLM_RATE_LIMIT_RPM")
+                or 0
+            )
+            _limiters[provider_name] = RateLimiter(rpm) if rpm > 0 else None
+        return _limiters[provider_name]
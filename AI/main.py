@@ -4,12 +4,17 @@
 # Author: <your name>
 # --------------------------------------------------------------
 
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
+import asyncio
+import json
+from contextlib import asynccontextmanager
 import os
 import shutil
 
-from fastapi import FastAPI, UploadFile, File
+from fastapi import BackgroundTasks, FastAPI, UploadFile, File
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from dotenv import load_dotenv
 
@@ -17,6 +22,8 @@ from dotenv import load_dotenv
 # Imports from the original code base
 # ───────────────────────────────────────────────────────────────
 from agno.agent import Agent
+from agno.run.agent import RunEvent
+from agno.utils.log import log_warning
 from _pdf_ import PDFKnowledgeBase as PDFKB
 from langextract_main import get_langextract_tool
 from tools.brave_search_tool import BraveSearch
@@ -26,6 +33,13 @@ from tools.crawl_ai import CrawlTool
 # Memory pieces – added in the previous response
 # ───────────────────────────────────────────────────────────────
 from memory_tool import MemoryTool
+from memory_writer import MemoryWriter
+from agent_registry import TTLRegistry, hash_secret
+from response_cache import SemanticResponseCache, scope_key
+from llms.completion_cache import get_completion_cache
+import db_schema
+from db_engine import pool_metrics
+from nomic_ai import shutdown_embedding_executor
 # ───────────────────────────────────────────────────────────────
 # LLM providers
 # ───────────────────────────────────────────────────────────────
@@ -39,7 +53,16 @@ from agno.models.anthropic import Claude
 # --------------------------------------------------------------
 load_dotenv()
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Startup and shutdown work; the hooks are defined further down."""
+    warmup_embedder()
+    bootstrap_schema()
+    yield
+    flush_memory_writer()
+    stop_embedding_executor()
+
+app = FastAPI(lifespan=lifespan)
 
 # --------------------------------------------------------------
 # Upload folder (used by the contract‑parser tool)
@@ -55,6 +78,8 @@ async def upload_file(file: UploadFile = File(...)):
         shutil.copyfileobj(file.file, buffer)
 
     await file.close()
+    # Answers about the previous version of this file are stale now.
+    await run_in_threadpool(invalidate_cached_answers, dest_path)
     return {"path": dest_path}
 
 # --------------------------------------------------------------
@@ -67,6 +92,11 @@ class Prompt(BaseModel):
     id: str
     tool: str
     tool_config: Dict[str, Any]
+    # Scope for chat memory: recall only sees turns from the same session / user.
+    session_id: Optional[str] = None
+    user_id: Optional[str] = None
+    # Set to False to always ask the model, skipping the semantic response cache.
+    use_cache: bool = True
 
 @app.get("/")
 def read_root():
@@ -99,94 +129,314 @@ def get_model(provider: str, model_id: str, api_key: str):
 # --------------------------------------------------------------
 memory_tool = MemoryTool()
 
+# Turns are written behind the response, in batches, by a background thread.
+memory_writer = MemoryWriter(
+    memory_tool.memory,
+    max_queue=int(os.getenv("MEMORY_QUEUE_SIZE", 1000)),
+    batch_size=int(os.getenv("MEMORY_BATCH_SIZE", 64)),
+)
+
+def save_turn(prompt: Prompt, assistant_message: str):
+    """Queue one user/assistant exchange for the memory DB, under the prompt's session and user."""
+    memory_writer.enqueue("user", prompt.message, prompt.session_id, prompt.user_id)
+    memory_writer.enqueue("assistant", assistant_message, prompt.session_id, prompt.user_id)
+
+def run_scope(prompt: Prompt) -> Dict[str, Any]:
+    """
+    Per-run arguments for the (shared) agent.  agno puts the ids on the
+    run context it injects into the MemoryTool, so recall is limited to
+    this session / user without the model ever seeing them.
+    """
+    return {"session_id": prompt.session_id, "user_id": prompt.user_id}
+
+# --------------------------------------------------------------
+# Semantic response cache – near-identical questions in the same
+# scope (provider, model, tool, document, user, session) reuse the answer
+# --------------------------------------------------------------
+response_cache = SemanticResponseCache(embedder=memory_tool.memory.embedder)
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+
+def response_cache_scope(prompt: Prompt) -> Optional[Dict[str, Any]]:
+    """
+    Cache scope of a prompt, or None when the cache is off for it.
+    The document's mtime and size are part of the key, so answers about
+    a file that has been replaced are never returned.  Answers also depend
+    on the session's history and memory, so the session is part of the key
+    and prompts with neither a session nor a user are not cached.
+    """
+    if not (RESPONSE_CACHE_ENABLED and prompt.use_cache):
+        return None
+    if not prompt.session_id and not prompt.user_id:
+        return None
+    document = prompt.tool_config.get("contract_parser") if prompt.tool == "contract_parser" else None
+    version = None
+    if document and os.path.exists(document):
+        stat = os.stat(document)
+        version = f"{stat.st_mtime}:{stat.st_size}"
+    return {
+        "scope": scope_key(
+            prompt.provider, prompt.id, prompt.tool, document, version, prompt.user_id, prompt.session_id
+        ),
+        "document": document,
+        "tenant": prompt.user_id,
+    }
+
+def cached_answer(prompt: Prompt, cache: Dict[str, Any]):
+    """(cached answer or None, prompt embedding); cache errors count as a miss."""
+    try:
+        return response_cache.lookup(prompt.message, cache["scope"])
+    except Exception as exc:
+        log_warning(f"Response cache lookup failed: {exc}")
+        return None, None
+
+def store_answer(prompt: Prompt, answer: str, cache: Dict[str, Any], embedding=None):
+    """Cache an answer; runs after the response has been sent."""
+    try:
+        response_cache.store(
+            prompt.message, answer, cache["scope"],
+            embedding=embedding, document=cache["document"], tenant=cache["tenant"],
+        )
+    except Exception as exc:
+        log_warning(f"Response cache store failed: {exc}")
+
+def invalidate_cached_answers(document: Optional[str] = None, tenant: Optional[str] = None) -> int:
+    try:
+        return response_cache.invalidate(document=document, tenant=tenant)
+    except Exception as exc:
+        log_warning(f"Response cache invalidation failed: {exc}")
+        return 0
+
+@app.delete("/cache/responses")
+def clear_cached_answers(document: Optional[str] = None, user_id: Optional[str] = None):
+    """
+    Drop cached answers about a document and/or for a user:
+    DELETE /cache/responses?document=...&user_id=...
+    """
+    if document is None and user_id is None:
+        return {"error": "Supply 'document' and/or 'user_id'"}
+    return {"removed": invalidate_cached_answers(document, user_id)}
+
+def flush_memory_writer():
+    """Write any queued turns before the worker exits."""
+    memory_writer.stop()
+
+def stop_embedding_executor():
+    """Let running tool searches finish before the worker exits."""
+    shutdown_embedding_executor()
+
+def warmup_embedder():
+    """Load the embedding model once so the first /chat/ request does not pay for it."""
+    memory_tool.memory.embedder.warmup()
+
+def bootstrap_schema():
+    """Create or migrate tables and indexes before serving, not on the request path."""
+    db_schema.bootstrap()
+
 # Optional helper routes – not strictly needed but handy in dev
 @app.post("/memory/add")
 def add_to_memory(payload: Dict[str, str]):
     """
-    Payload: {"role": "user|assistant", "content": "text"}
+    Payload: {"role": "user|assistant", "content": "text",
+              "session_id": "optional", "user_id": "optional"}
     """
     role = payload.get("role")
     content = payload.get("content")
     if not role or not content:
         return {"error": "Both 'role' and 'content' must be supplied"}
-    memory_tool.memory.add_message(role, content)
+    memory_tool.memory.add_message(
+        role, content, session_id=payload.get("session_id"), user_id=payload.get("user_id")
+    )
     return {"status": "stored"}
 
 @app.get("/memory/recall")
-def recall_memory(query: str, k: int = 5):
+def recall_memory(query: str, k: int = 5, session_id: Optional[str] = None, user_id: Optional[str] = None):
     """
     Retrieve the top‑k most relevant memory messages:
-    GET /memory/recall?query=...
+    GET /memory/recall?query=...&session_id=...&user_id=...
     """
-    return {"results": memory_tool.memory.recall(query, k)}
+    return {"results": memory_tool.memory.recall(query, k, session_id=session_id, user_id=user_id)}
 
 # --------------------------------------------------------------
-# The single chat endpoint – everything runs here
+# Reused across requests: model clients, toolkits and agents
 # --------------------------------------------------------------
-@app.post("/chat/")
-def chat_with_agent(prompt: Prompt):
-    """
-    Handles the chat request, applies tools and persists the
-    conversational history to memory.
-    """
+CACHE_TTL = float(os.getenv("AGENT_CACHE_TTL", 900))
+models = TTLRegistry("models", ttl_seconds=CACHE_TTL)
+toolkits = TTLRegistry("toolkits", ttl_seconds=CACHE_TTL)
+agents = TTLRegistry("agents", ttl_seconds=CACHE_TTL)
 
-    # 1. Start with the base tools that the user requested
-    tools = []
-
-    # Ask the user for additional tools
-    if prompt.tool == "brave_search" and "brave_key" in prompt.tool_config:
-        tools.append(BraveSearch(api_key=prompt.tool_config["brave_key"]))
-    elif prompt.tool == "serp_tool" and "serp_key" in prompt.tool_config:
-        tools.append(SerpTool(api_key=prompt.tool_config["serp_key"]))
-    elif prompt.tool == "crawl_ai":
-        tools.append(CrawlTool())
-    elif prompt.tool == "contract_parser":
-        # The PDF parser tool expects the file to be already on disk
-        file_path = prompt.tool_config.get("contract_parser")
-        if not file_path:
-            return {"error": "No PDF file uploaded"}
-        pdf_tool = PDFKB()
-        pdf_tool.file_path = file_path
-        tools.append(pdf_tool)
-
-    # 2. Always add the memory tool so the agent can ask for context.
-    tools.insert(0, memory_tool)
-
-    # 3. Instruction prompt for the agent
-    extra_instructions = """
+AGENT_INSTRUCTIONS = """
     - Use the tools you were given to answer the user.
     - You have a persistent memory of past assistant responses; you can ask for them
       via the MemoryTool if needed.
     - Do not ask the user to re‑upload a PDF that has already been parsed.
     """
 
-    # 4. Create the LLM instance
-    model = get_model(
-        provider=prompt.provider,
-        model_id=prompt.id,
-        api_key=prompt.api_key
-    )
+def _new_pdf_tool(file_path: str):
+    pdf_tool = PDFKB()
+    pdf_tool.file_path = file_path
+    return pdf_tool
 
-    # 5. Build the agent
-    agent = Agent(
-        model=model,
-        tools=tools,
-        tool_choice="auto",
-        read_chat_history=True,
-        read_tool_call_history=True,
-        debug_mode=True,
-        markdown=True,
-        instructions=extra_instructions
-    )
+def get_toolkit(tool: str, tool_config: Dict[str, Any]):
+    """
+    Return the (cache key, toolkit) the user asked for, or (None, None).
+    Keys hold hashes of tool API keys, never the keys themselves.
+    """
+    if tool == "brave_search" and "brave_key" in tool_config:
+        key = ("brave_search", hash_secret(tool_config["brave_key"]))
+        return key, toolkits.get_or_create(key, lambda: BraveSearch(api_key=tool_config["brave_key"]))
+    if tool == "serp_tool" and "serp_key" in tool_config:
+        key = ("serp_tool", hash_secret(tool_config["serp_key"]))
+        return key, toolkits.get_or_create(key, lambda: SerpTool(api_key=tool_config["serp_key"]))
+    if tool == "crawl_ai":
+        key = ("crawl_ai",)
+        return key, toolkits.get_or_create(key, CrawlTool)
+    if tool == "contract_parser":
+        file_path = tool_config["contract_parser"]
+        key = ("contract_parser", file_path)
+        return key, toolkits.get_or_create(key, lambda: _new_pdf_tool(file_path))
+    return None, None
+
+def get_agent(prompt: Prompt):
+    """
+    Return an agent for (provider, model id, api key hash, tool set),
+    building the model, toolkit and agent only on a cache miss.
+    """
+    api_key_hash = hash_secret(prompt.api_key)
+    tool_key, toolkit = get_toolkit(prompt.tool, prompt.tool_config)
+
+    def build_agent():
+        model = models.get_or_create(
+            (prompt.provider.lower(), prompt.id, api_key_hash),
+            lambda: get_model(provider=prompt.provider, model_id=prompt.id, api_key=prompt.api_key),
+        )
+        # The memory tool is always first so the agent can ask for context.
+        tools = [memory_tool] + ([toolkit] if toolkit is not None else [])
+        return Agent(
+            model=model,
+            tools=tools,
+            tool_choice="auto",
+            read_chat_history=True,
+            read_tool_call_history=True,
+            debug_mode=True,
+            markdown=True,
+            instructions=AGENT_INSTRUCTIONS
+        )
+
+    key = (prompt.provider.lower(), prompt.id, api_key_hash, tool_key)
+    return agents.get_or_create(key, build_agent)
 
-    # 6. Run the conversation
+@app.get("/metrics/cache")
+def cache_metrics():
+    """Hit/miss counters of the agent, model and toolkit caches."""
+    stats = {registry.name: registry.stats() for registry in (agents, models, toolkits)}
+    stats["memory_writer"] = memory_writer.stats()
+    stats["response_cache"] = response_cache.stats()
+    stats["completion_cache"] = get_completion_cache().stats()
+    return stats
+
+@app.get("/metrics/db-pool")
+def db_pool_metrics():
+    """Connection pool usage: checked-out, overflow and wait time."""
+    return pool_metrics()
+
+# --------------------------------------------------------------
+# The single chat endpoint – everything runs here
+# --------------------------------------------------------------
+@app.post("/chat/")
+async def chat_with_agent(prompt: Prompt, background_tasks: BackgroundTasks):
+    """
+    Handles the chat request, applies tools and persists the
+    conversational history to memory.
+    """
+    # The PDF parser tool expects the file to be already on disk
+    if prompt.tool == "contract_parser" and not prompt.tool_config.get("contract_parser"):
+        return {"error": "No PDF file uploaded"}
+
+    # A near-identical question in the same scope is answered from the cache.
+    cache = response_cache_scope(prompt)
+    embedding = None
+    if cache:
+        cached, embedding = await run_in_threadpool(cached_answer, prompt, cache)
+        if cached is not None:
+            save_turn(prompt, cached)
+            return {"response": cached, "cached": True}
+
+    # Agents, models and toolkits are reused for the same provider, key and tools.
+    # Building one on a cache miss can touch the DB, so keep it off the event loop.
+    agent = await run_in_threadpool(get_agent, prompt)
+
+    # Run the conversation
     try:
-        response = agent.run(prompt.message)
+        response = await agent.arun(prompt.message, **run_scope(prompt))
 
-        # 7. Persist the pair (user + assistant) to the memory DB
-        memory_tool.memory.add_message("user", prompt.message)
-        memory_tool.memory.add_message("assistant", response.content)
+        # Persist the pair (user + assistant) to the memory DB, off the response path.
+        save_turn(prompt, response.content)
+        if cache:
+            background_tasks.add_task(store_answer, prompt, response.content, cache, embedding)
 
         return {"response": response.content}
     except Exception as exc:
         return {"error": str(exc)}
+
+# --------------------------------------------------------------
+# Streaming variant – server-sent events
+# --------------------------------------------------------------
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    """Format one server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+async def stream_agent_events(agent: Agent, prompt: Prompt):
+    """
+    Forward the agent's output as SSE: `token` events as content arrives,
+    `tool_call_started` / `tool_call_completed` around tool calls, then a
+    final `done` (or `error`).  A cached answer is sent as a single token.
+    """
+    cache = response_cache_scope(prompt)
+    embedding = None
+    if cache:
+        cached, embedding = await run_in_threadpool(cached_answer, prompt, cache)
+        if cached is not None:
+            save_turn(prompt, cached)
+            yield _sse("token", {"content": cached})
+            yield _sse("done", {"response": cached, "cached": True})
+            return
+
+    chunks = []
+    try:
+        async for event in agent.arun(
+            prompt.message, stream=True, stream_events=True, **run_scope(prompt)
+        ):
+            if event.event == RunEvent.run_content.value and event.content:
+                chunks.append(str(event.content))
+                yield _sse("token", {"content": str(event.content)})
+            elif event.event == RunEvent.tool_call_started.value:
+                yield _sse("tool_call_started", {"tool": event.tool.tool_name, "args": event.tool.tool_args})
+            elif event.event == RunEvent.tool_call_completed.value:
+                yield _sse("tool_call_completed", {"tool": event.tool.tool_name})
+            elif event.event == RunEvent.run_error.value:
+                yield _sse("error", {"error": str(event.content)})
+                return
+    except Exception as exc:
+        yield _sse("error", {"error": str(exc)})
+        return
+
+    reply = "".join(chunks)
+    save_turn(prompt, reply)
+    if cache:
+        # Not awaited: the client should not wait for the cache write.
+        asyncio.get_running_loop().run_in_executor(None, store_answer, prompt, reply, cache, embedding)
+    yield _sse("done", {"response": reply})
+
+@app.post("/chat/stream/")
+async def stream_chat_with_agent(prompt: Prompt):
+    """Same as /chat/, but streams tokens and tool-call events as they are produced."""
+    if prompt.tool == "contract_parser" and not prompt.tool_config.get("contract_parser"):
+        return {"error": "No PDF file uploaded"}
+
+    agent = await run_in_threadpool(get_agent, prompt)
+    return StreamingResponse(
+        stream_agent_events(agent, prompt),
+        media_type="text/event-stream",
+        # Stop proxies from buffering the stream.
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
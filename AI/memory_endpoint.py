@@ -5,7 +5,8 @@ from typing import Dict
 @app.post("/memory/add")
 def add_to_memory(payload: Dict[str, str]):
     """
-    Expected JSON: { "role": "user|assistant", "content": "Some text" }
+    Expected JSON: { "role": "user|assistant", "content": "Some text",
+                     "session_id": "optional", "user_id": "optional" }
     """
     role = payload.get("role")
     content = payload.get("content")
@@ -14,5 +15,7 @@ def add_to_memory(payload: Dict[str, str]):
             content="Missing 'role' or 'content' in payload",
             status_code=status.HTTP_400_BAD_REQUEST,
         )
-    memory_tool.memory.add_message(role, content)
+    memory_tool.memory.add_message(
+        role, content, session_id=payload.get("session_id"), user_id=payload.get("user_id")
+    )
     return {"status": "stored"}
@@ -0,0 +1,40 @@
+# memory_retention.py
+# -------------------------------------------------------------
+# Retention / compaction job for the chat memory table, meant to run
+# from cron or a scheduler:
+#
+#   python memory_retention.py                    # settings from the environment
+#   python memory_retention.py --days 7 --mode drop
+# -------------------------------------------------------------
+import argparse
+import os
+from typing import Dict
+
+from memory_store import MemoryStore, summarize_turns
+
+
+def run_retention(days: float, mode: str = "summarize") -> Dict[str, int]:
+    """
+    Compact turns older than `days`.
+    Args:
+        days(float): retention period; 0 disables the job.
+        mode(str): "summarize" keeps one extractive summary per session,
+            "drop" deletes old turns outright.
+    Returns:
+        dict: number of rows deleted and summaries written.
+    """
+    if days <= 0:
+        return {"deleted": 0, "summaries": 0}
+    if mode not in ("summarize", "drop"):
+        raise ValueError(f"Unsupported retention mode: {mode}")
+    return MemoryStore().compact(days, summarize=summarize_turns if mode == "summarize" else None)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compact old chat memory.")
+    parser.add_argument("--days", type=float, default=float(os.getenv("MEMORY_RETENTION_DAYS", 30)))
+    parser.add_argument("--mode", choices=["summarize", "drop"], default=os.getenv("MEMORY_RETENTION_MODE", "summarize"))
+    args = parser.parse_args()
+
+    result = run_retention(args.days, args.mode)
+    print(f"Deleted {result['deleted']} turns, wrote {result['summaries']} summaries")
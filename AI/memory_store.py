@@ -4,69 +4,357 @@
 # -------------------------------------------------------------
 import hashlib
 import os
-from typing import List, Optional
+from typing import Callable, Dict, List, Optional
 
-from sqlalchemy import create_engine, text
+from sqlalchemy import Column, String, create_engine, text
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.inspection import inspect
 
 from agno.knowledge.document import Document
+from agno.utils.log import log_info
+from agno.vectordb.distance import Distance
 from agno.vectordb.pgvector import PgVector, SearchType
 from agno.knowledge.embedder.base import Embedder
 
 from nomic_ai import NomicAIEmbedder  # reuse the same embedder
+from memory_window import RecentTurns
+from vector_index import apply_search_params, create_vector_index, drop_text_index, get_vector_index
+from vector_utils import DISTANCE_OPERATORS, bulk_upsert
+from db_schema import check_vector_dimensions, ensure_schema
+from db_engine import disable_statement_timeout, get_db_url, get_engine
+
+# Indexed columns that scope a memory row to one conversation and one user.
+SCOPE_COLUMNS = ("session_id", "user_id")
+
+# Similarity (higher is closer) from a pgvector distance `d`; embeddings are unit length.
+SIMILARITY = {
+    Distance.cosine: "1 - {d}",
+    Distance.l2: "1 - {d} * {d} / 2",
+    Distance.max_inner_product: "-{d}",
+}
+
+
+def summarize_turns(turns: List[str], max_chars: int = 2000) -> str:
+    """
+    Extractive summary used by compaction: the user turns (and earlier
+    summaries) in order, trimmed to `max_chars`.
+    """
+    kept = [turn for turn in turns if not turn.startswith("assistant: ")]
+    summary = f"Earlier conversation ({len(turns)} turns): " + " | ".join(kept)
+    return summary[:max_chars]
 
 class MemoryStore:
     """
     A tiny wrapper around the existing PostgreSQL+pgVector table –
     `chat_memory`.  Each row stores the full text of a chat turn
-    (role + content) and its vector representation.
+    (role + content) and its vector representation, tagged with the
+    session and user it belongs to so recall stays inside that scope.
     """
 
     def __init__(
         self,
-        db_url: str = "postgresql://ai:ai@pgvector:5432/ai",
+        db_url: Optional[str] = None,
         table_name: str = "ChatMemory",
         embedder: Optional[Embedder] = None,
+        window: Optional[int] = None,
+        half_life_hours: Optional[float] = None,
     ):
-        self.db_url = db_url
+        self.db_url = db_url or get_db_url()
         self.table_name = table_name
         self.embedder = embedder or NomicAIEmbedder()
+        # Semantic hits lose half their score every `half_life_hours`; 0 turns decay off.
+        self.half_life_hours = (
+            half_life_hours if half_life_hours is not None
+            else float(os.getenv("MEMORY_HALF_LIFE_HOURS", 72))
+        )
+        # Last turns of each session, kept in process for the recent window.
+        self.recent_turns = RecentTurns(
+            window=window or int(os.getenv("MEMORY_WINDOW_TURNS", 10)),
+            max_sessions=int(os.getenv("MEMORY_WINDOW_SESSIONS", 1000)),
+        )
 
-        # create engine + DB session
-        self.engine = create_engine(self.db_url)
+        # create engine + DB session; the shared pool unless a custom URL is given
+        self.engine = create_engine(db_url) if db_url else get_engine()
         self.Session = sessionmaker(bind=self.engine)
 
         # vector extension
         self.vector_db = PgVector(
             table_name=self.table_name,
-            db_url=self.db_url,
+            db_engine=self.engine,
             embedder=self.embedder,
             search_type=SearchType.vector,
+            vector_index=get_vector_index(),
         )
+        # Declare the scope columns on agno's table so inserts can fill them.
+        for column in SCOPE_COLUMNS:
+            if column not in self.vector_db.table.c:
+                self.vector_db.table.append_column(Column(column, String))
 
     # ----------------------------------------------------------------
     #  Basic helper – create the vector DB table on first run
     # ----------------------------------------------------------------
     def init_table(self):
-        if not inspect(self.engine).has_table(self.table_name):
-            with self.Session() as session, session.begin():
-                session.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
-                # The underlying PgVector class creates the actual table.
-                self.vector_db.create()
+        # Migrations run once per process; afterwards this is a set lookup.
+        ensure_schema(self.engine, f"memory:{self.table_name}", [
+            (1, "create table", self.vector_db.create),
+            (2, "vector index", self.create_index),
+            (3, "session and user columns", self.create_scope_columns),
+            (4, "session recency index", self.create_recency_index),
+            (5, "drop unused full-text index", lambda: drop_text_index(self.vector_db)),
+        ], check=self.check_dimensions)
+
+    # ----------------------------------------------------------------
+    #  Refuse to run against a table built with another embedding size
+    # ----------------------------------------------------------------
+    def check_dimensions(self):
+        check_vector_dimensions(self.engine, self.vector_db.schema, self.table_name, self.vector_db.dimensions)
+
+    def _qualified_table(self) -> str:
+        return f'"{self.vector_db.schema}"."{self.table_name}"'
+
+    # ----------------------------------------------------------------
+    #  session_id / user_id columns with btree indexes for filtering
+    # ----------------------------------------------------------------
+    def create_scope_columns(self):
+        table = self._qualified_table()
+        with self.Session() as session, session.begin():
+            disable_statement_timeout(session)
+            for column in SCOPE_COLUMNS:
+                session.execute(text(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {column} TEXT"))
+                session.execute(text(
+                    f'CREATE INDEX IF NOT EXISTS "idx_{self.table_name}_{column}" ON {table} ({column})'
+                ))
+
+    # ----------------------------------------------------------------
+    #  (session_id, created_at) index for the recent window fallback and
+    #  for retention, which both select by age
+    # ----------------------------------------------------------------
+    def create_recency_index(self):
+        table = self._qualified_table()
+        with self.Session() as session, session.begin():
+            disable_statement_timeout(session)
+            session.execute(text(
+                f'CREATE INDEX IF NOT EXISTS "idx_{self.table_name}_session_created" '
+                f"ON {table} (session_id, created_at)"
+            ))
+
+    # ----------------------------------------------------------------
+    #  HNSW / IVFFlat index on the embedding column; recall never
+    #  does full-text search, so no GIN index
+    # ----------------------------------------------------------------
+    def create_index(self, force_recreate: bool = False):
+        create_vector_index(self.vector_db, force_recreate=force_recreate)
+
+    def rebuild_index(self):
+        self.create_index(force_recreate=True)
 
     # ----------------------------------------------------------------
     #  Store a message (role + content) as a Document
     # ----------------------------------------------------------------
-    def add_message(self, role: str, content: str, batch_size: int = 200):
+    def add_message(
+        self,
+        role: str,
+        content: str,
+        session_id: Optional[str] = None,
+        user_id: Optional[str] = None,
+        batch_size: int = 200,
+    ):
+        message = {"role": role, "content": content, "session_id": session_id, "user_id": user_id}
+        self.add_messages([message], batch_size=batch_size)
+
+    # ----------------------------------------------------------------
+    #  Store many messages: one embedding pass, one INSERT per batch.
+    #  Each message is a dict with role, content and optionally
+    #  session_id / user_id.
+    # ----------------------------------------------------------------
+    def add_messages(
+        self,
+        messages: List[Dict[str, Optional[str]]],
+        batch_size: int = 200,
+        remember: bool = True,
+    ):
+        """
+        Args:
+            messages(list): message dicts to store.
+            batch_size(int): rows per INSERT.
+            remember(bool): also add them to the recent-turns window; the
+                write-behind queue does that itself when it accepts a turn.
+        """
+        if not messages:
+            return
+        if remember:
+            self.remember(messages)
+        self.init_table()
+        docs = [
+            Document(
+                content=f"{message['role']}: {message['content']}",
+                meta_data={
+                    "role": message["role"],
+                    **{column: message.get(column) for column in SCOPE_COLUMNS},
+                },
+            )
+            for message in messages
+        ]
+        bulk_upsert(self.vector_db, docs, batch_size=batch_size, meta_columns=SCOPE_COLUMNS)
+
+    def remember(self, messages: List[Dict[str, Optional[str]]]):
+        """
+        Add messages that belong to a session to its recent-turns window.
+        The window is keyed by (session_id, user_id): session ids come from
+        the client, so one alone must not reveal another user's turns.
+        """
+        for message in messages:
+            if message.get("session_id"):
+                key = (message["session_id"], message.get("user_id"))
+                self.recent_turns.append(key, f"{message['role']}: {message['content']}")
+
+    def _scope(self, session_id: Optional[str], user_id: Optional[str], params: Dict) -> str:
+        """WHERE clause for the given scope; fills the bind values into `params`."""
+        conditions = []
+        for column, value in zip(SCOPE_COLUMNS, (session_id, user_id)):
+            if value is not None:
+                conditions.append(f"{column} = :{column}")
+                params[column] = value
+        return f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    # ----------------------------------------------------------------
+    #  The last `n` turns of a session, oldest first: from the in-process
+    #  window when this worker has seen the session, else from the table
+    # ----------------------------------------------------------------
+    def recent(self, session_id: str, n: int = 5, user_id: Optional[str] = None) -> List[str]:
+        turns = self.recent_turns.last((session_id, user_id), n)
+        if turns:
+            return turns
+
+        self.init_table()
+        params = {"n": n}
+        sql = text(f"""
+            SELECT content FROM {self._qualified_table()}
+            {self._scope(session_id, user_id, params)}
+            ORDER BY created_at DESC
+            LIMIT :n
+        """)
+        with self.Session() as session:
+            rows = session.execute(sql, params).fetchall()
+        return [row.content for row in reversed(rows)]
+
+    # ----------------------------------------------------------------
+    #  Return the top‑k relevant memories for a prompt, optionally
+    #  only from one session and/or one user.  Hits are scored by
+    #  similarity × 0.5 ^ (age / half-life), so old turns fade out.
+    # ----------------------------------------------------------------
+    def recall(
+        self,
+        query: str,
+        k: int = 5,
+        session_id: Optional[str] = None,
+        user_id: Optional[str] = None,
+        half_life_hours: Optional[float] = None,
+    ) -> List[str]:
         self.init_table()
-        doc = Document(content=f"{role}: {content}")
-        self.vector_db.upsert(documents=[doc])
+        embedding = self.embedder.get_embedding(query)
+        operator = DISTANCE_OPERATORS.get(self.vector_db.distance, "<=>")
+        similarity = SIMILARITY.get(self.vector_db.distance, SIMILARITY[Distance.cosine]).format(d="distance")
+        half_life = self.half_life_hours if half_life_hours is None else half_life_hours
+
+        # The nearest `candidates` come first; decay only re-orders them.
+        candidates = max(k * 4, 20) if half_life else k
+        params = {"embedding": str(list(embedding)), "k": k, "candidates": candidates}
+        where = self._scope(session_id, user_id, params)
+        if half_life:
+            params["half_life"] = half_life * 3600
+            score = f"({similarity}) * power(0.5, extract(epoch FROM now() - created_at) / :half_life)"
+        else:
+            score = similarity
+
+        if where:
+            # A scoped search filters first (btree indexes) and ranks that
+            # scope's rows exactly.  Ordered by distance over the whole table,
+            # the ANN index would filter only after its scan, and a session
+            # owning a small share of the table could get no rows back.
+            source = f"""
+                scoped AS MATERIALIZED (
+                    SELECT content, created_at, embedding
+                    FROM {self._qualified_table()}
+                    {where}
+                ),
+                hits AS (
+                    SELECT content, created_at, embedding {operator} CAST(:embedding AS vector) AS distance
+                    FROM scoped
+                    ORDER BY distance
+                    LIMIT :candidates
+                )"""
+        else:
+            source = f"""
+                hits AS (
+                    SELECT content, created_at, embedding {operator} CAST(:embedding AS vector) AS distance
+                    FROM {self._qualified_table()}
+                    ORDER BY distance
+                    LIMIT :candidates
+                )"""
+
+        sql = text(f"""
+            WITH {source}
+            SELECT content FROM hits
+            ORDER BY {score} DESC
+            LIMIT :k
+        """)
+        with self.Session() as session, session.begin():
+            apply_search_params(session, self.vector_db.vector_index, candidates)
+            rows = session.execute(sql, params).fetchall()
+        return [row.content for row in rows]
 
     # ----------------------------------------------------------------
-    #  Return the top‑k relevant memories for a prompt
+    #  Retention: drop turns older than `older_than_days`, or replace
+    #  each session's old turns with one summary row
     # ----------------------------------------------------------------
-    def recall(self, query: str, k: int = 5) -> List[str]:
+    def compact(
+        self,
+        older_than_days: float,
+        summarize: Optional[Callable[[List[str]], str]] = None,
+    ) -> Dict[str, int]:
+        """
+        Args:
+            older_than_days(float): age after which turns are compacted.
+            summarize(callable): turns -> summary text; None just deletes.
+        Returns:
+            dict: number of rows deleted and summaries written.
+        """
         self.init_table()
-        docs = self.vector_db.search(query=query, k=k)
-        return [doc.content for doc in docs]
+        table = self._qualified_table()
+        params = {"days": older_than_days}
+        old = "created_at < now() - make_interval(secs => :days * 86400)"
+        deleted = summaries = 0
+
+        if summarize is None:
+            with self.Session() as session, session.begin():
+                deleted = session.execute(text(f"DELETE FROM {table} WHERE {old}"), params).rowcount
+            log_info(f"Memory retention: deleted {deleted} turns from {self.table_name}")
+            return {"deleted": deleted, "summaries": 0}
+
+        with self.Session() as session:
+            groups = session.execute(text(f"""
+                SELECT session_id, user_id, array_agg(content ORDER BY created_at) AS turns
+                FROM {table} WHERE {old}
+                GROUP BY session_id, user_id
+            """), params).fetchall()
+
+        for group in groups:
+            # Written first, so a crash between the two steps loses nothing.
+            self.add_messages([{
+                "role": "summary",
+                "content": summarize(list(group.turns)),
+                "session_id": group.session_id,
+                "user_id": group.user_id,
+            }], remember=False)
+            summaries += 1
+            with self.Session() as session, session.begin():
+                deleted += session.execute(text(f"""
+                    DELETE FROM {table}
+                    WHERE {old}
+                      AND session_id IS NOT DISTINCT FROM :session_id
+                      AND user_id IS NOT DISTINCT FROM :user_id
+                """), {**params, "session_id": group.session_id, "user_id": group.user_id}).rowcount
+
+        log_info(f"Memory retention: replaced {deleted} turns with {summaries} summaries in {self.table_name}")
+        return {"deleted": deleted, "summaries": summaries}
@@ -2,8 +2,14 @@
 # -------------------------------------------------------------
 # A LangChain Agent tool that lets the agent query the conversation history.
 # -------------------------------------------------------------
+import asyncio
+from functools import partial
+from typing import Optional
+
+from agno.run import RunContext
 from agno.tools.toolkit import Toolkit
 from memory_store import MemoryStore
+from nomic_ai import embedding_executor
 
 class MemoryTool(Toolkit):
     """
@@ -12,15 +18,48 @@ class MemoryTool(Toolkit):
     """
     name = "MemoryTool"
 
-    def __init__(self):
+    def __init__(self, k: int = 5, recent_turns: int = 5):
         super().__init__(name=self.name)
         self.memory = MemoryStore()
+        self.k = k
+        self.recent_turns = recent_turns
         self.register(self.recall)
+        # Agent.arun prefers the async variant registered under the same name.
+        self.register(self.arecall, name="recall")
 
-    def recall(self, query: str) -> str:
+    def recall(self, query: str, mode: str = "hybrid", run_context: Optional[RunContext] = None) -> str:
         """
-        Search the memory DB and return a text block that contains the
-        top‑k most relevant previously stored turns.
+        Search the memory DB and return a text block of previously stored turns.
+        `mode` is "recent" for the last few turns of this conversation,
+        "semantic" for the most relevant turns (recent ones weigh more), or
+        "hybrid" (default) for both.
+        `run_context` is injected by the agent run and is not part of the
+        tool schema: the search is limited to its session_id / user_id, so
+        the model can never choose whose memory it reads.
         """
-        results = self.memory.recall(query=query)
+        session_id = getattr(run_context, "session_id", None)
+        user_id = getattr(run_context, "user_id", None)
+        if not session_id and not user_id:
+            return "No relevant memory found."
+
+        results = []
+        if mode in ("recent", "hybrid") and session_id:
+            results.extend(self.memory.recent(session_id, self.recent_turns, user_id=user_id))
+        if mode in ("semantic", "hybrid") or not session_id:
+            hits = self.memory.recall(query=query, k=self.k, session_id=session_id, user_id=user_id)
+            results.extend(hit for hit in hits if hit not in results)
         return "\n\n".join(results) if results else "No relevant memory found."
+
+    async def arecall(self, query: str, mode: str = "hybrid", run_context: Optional[RunContext] = None) -> str:
+        """
+        Search the memory DB and return a text block of previously stored turns.
+        `mode` is "recent" for the last few turns of this conversation,
+        "semantic" for the most relevant turns (recent ones weigh more), or
+        "hybrid" (default) for both.
+        Same search as `recall`, run on the embedding executor so the query
+        embedding and database round trips do not block the event loop.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            embedding_executor(), partial(self.recall, query, mode, run_context)
+        )
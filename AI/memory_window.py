@@ -0,0 +1,47 @@
+# memory_window.py
+# -------------------------------------------------------------
+# In-process ring buffer of the most recent turns of each session,
+# so "what was just said" is answered without a DB round trip.
+# -------------------------------------------------------------
+import threading
+from collections import OrderedDict, deque
+from typing import Deque, Hashable, List
+
+
+class RecentTurns:
+    """
+    Keeps the last `window` turns of up to `max_sessions` sessions.
+    Sessions are evicted least recently used first; a worker that never
+    saw a session (e.g. after a restart) simply has no entry for it.
+    A session is identified by any hashable key, e.g. (session_id, user_id).
+    """
+
+    def __init__(self, window: int = 10, max_sessions: int = 1000):
+        self.window = window
+        self.max_sessions = max_sessions
+        self._sessions: "OrderedDict[Hashable, Deque[str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def append(self, session_id: Hashable, turn: str):
+        """Add one formatted turn ("role: content") to the session's window."""
+        with self._lock:
+            turns = self._sessions.get(session_id)
+            if turns is None:
+                turns = self._sessions[session_id] = deque(maxlen=self.window)
+            turns.append(turn)
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+
+    def last(self, session_id: Hashable, n: int) -> List[str]:
+        """The session's last `n` turns, oldest first."""
+        with self._lock:
+            turns = self._sessions.get(session_id)
+            if not turns:
+                return []
+            self._sessions.move_to_end(session_id)
+            return list(turns)[-n:]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._sessions)
@@ -0,0 +1,120 @@
+# memory_writer.py
+# -------------------------------------------------------------
+# Write-behind queue for chat memory: requests enqueue turns and a
+# background thread embeds and stores them in batches.
+# -------------------------------------------------------------
+import queue
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from agno.utils.log import log_debug, log_error, log_warning
+
+from memory_store import MemoryStore
+
+_STOP = object()
+
+
+class MemoryWriter:
+    """
+    Coalesces chat turns from many requests and writes them with
+    `MemoryStore.add_messages`, i.e. one embedding pass and one transaction
+    per batch.  The queue is bounded; when it is full new turns are dropped
+    (and counted) rather than blocking the request.
+    """
+
+    def __init__(
+        self,
+        store: MemoryStore,
+        max_queue: int = 1000,
+        batch_size: int = 64,
+        flush_interval: float = 0.5,
+    ):
+        self.store = store
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        # Updated by request threads and the writer thread.
+        self._stats_lock = threading.Lock()
+        self.dropped = 0
+        self.written = 0
+
+        self._thread = threading.Thread(target=self._run, name="memory-writer", daemon=True)
+        self._thread.start()
+
+    def enqueue(
+        self,
+        role: str,
+        content: str,
+        session_id: Optional[str] = None,
+        user_id: Optional[str] = None,
+    ) -> bool:
+        """
+        Queue one message for storage without waiting for it.
+        Args:
+            role(str): "user" or "assistant".
+            content(str): message text.
+            session_id(str): conversation the message belongs to.
+            user_id(str): user the message belongs to.
+        Returns:
+            bool: False if the queue was full and the message was dropped.
+        """
+        message = {"role": role, "content": content, "session_id": session_id, "user_id": user_id}
+        # The recent window sees the turn now, before it is embedded and stored.
+        self.store.remember([message])
+        try:
+            self.queue.put_nowait(message)
+            return True
+        except queue.Full:
+            with self._stats_lock:
+                self.dropped += 1
+                dropped = self.dropped
+            log_warning(f"Memory queue full, dropped a {role} message ({dropped} dropped so far)")
+            return False
+
+    def _next_batch(self) -> Tuple[List[Dict[str, Optional[str]]], bool]:
+        """Block for the first message, then take whatever else is already waiting."""
+        batch: List[Dict[str, Optional[str]]] = []
+        item = self.queue.get()
+        if item is _STOP:
+            return batch, True
+        batch.append(item)
+
+        while len(batch) < self.batch_size:
+            try:
+                item = self.queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch, stopping = self._next_batch()
+            if batch:
+                try:
+                    self.store.add_messages(batch, batch_size=self.batch_size, remember=False)
+                    with self._stats_lock:
+                        self.written += len(batch)
+                    log_debug(f"Stored {len(batch)} memory messages")
+                except Exception as e:
+                    log_error(f"Failed to store {len(batch)} memory messages: {e}")
+            # One task_done per item taken, including the stop marker.
+            for _ in range(len(batch) + (1 if stopping else 0)):
+                self.queue.task_done()
+
+    def flush(self):
+        """Block until every queued message has been written."""
+        self.queue.join()
+
+    def stop(self, timeout: float = 30):
+        """Write what is left in the queue and stop the background thread."""
+        self.queue.put(_STOP)
+        self._thread.join(timeout=timeout)
+
+    def stats(self):
+        """Queue depth and counters, for monitoring."""
+        with self._stats_lock:
+            return {"queued": self.queue.qsize(), "written": self.written, "dropped": self.dropped}
@@ -1,45 +1,202 @@
 from agno.knowledge.embedder.base import Embedder
+from agno.utils.log import log_info
+from embedding_cache import EmbeddingCache, content_hash, get_embedding_cache
 from transformers import AutoTokenizer, AutoModel
 import torch
-from typing import Optional
+import torch.nn.functional as F
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, List, Tuple, Any
+
+# Tokenizer/model pairs keyed by model id, loaded once per process and
+# shared by every NomicAIEmbedder instance.
+_MODEL_CACHE: Dict[str, Tuple[Any, Any]] = {}
+_MODEL_LOCK = threading.Lock()
+
+# Pool for blocking embed-and-search work started from async code (agent
+# tool calls), so it runs off the event loop.  Kept small: every job runs
+# the model, and more concurrent forward passes only contend for the CPU.
+_EXECUTOR: Optional[ThreadPoolExecutor] = None
+_EXECUTOR_LOCK = threading.Lock()
+
+# Full output size of nomic-embed-text-v1.5 and the smallest Matryoshka
+# prefix it was trained to support.
+MAX_DIMENSIONS = 768
+MIN_DIMENSIONS = 64
+
+
+def load_model(model_id: str) -> Tuple[Any, Any]:
+    """
+    Load the tokenizer and model for `model_id` once and reuse them afterwards.
+    Args:
+        model_id(str): Hugging Face id of the embedding model.
+    """
+    cached = _MODEL_CACHE.get(model_id)
+    if cached is not None:
+        return cached
+
+    with _MODEL_LOCK:
+        cached = _MODEL_CACHE.get(model_id)
+        if cached is None:
+            log_info(f"Loading embedding model {model_id}")
+            tokenizer = AutoTokenizer.from_pretrained(model_id)
+            model = AutoModel.from_pretrained(model_id, trust_remote_code=True)
+            model.eval()
+            cached = (tokenizer, model)
+            _MODEL_CACHE[model_id] = cached
+    return cached
+
+
+def embedding_executor() -> ThreadPoolExecutor:
+    """
+    Return the shared executor for embedding work, creating it on first use.
+    Its size is $EMBEDDING_WORKERS (default 2).
+    """
+    global _EXECUTOR
+    if _EXECUTOR is None:
+        with _EXECUTOR_LOCK:
+            if _EXECUTOR is None:
+                _EXECUTOR = ThreadPoolExecutor(
+                    max_workers=int(os.getenv("EMBEDDING_WORKERS", 2)),
+                    thread_name_prefix="embedding",
+                )
+    return _EXECUTOR
+
+
+def shutdown_embedding_executor():
+    """Wait for queued embedding work to finish and release the pool."""
+    global _EXECUTOR
+    with _EXECUTOR_LOCK:
+        executor, _EXECUTOR = _EXECUTOR, None
+    if executor is not None:
+        executor.shutdown(wait=True)
+
 
 class NomicAIEmbedder(Embedder):
     dimensions: Optional[int] = 768
-    
-    def __init__(self):
+
+    def __init__(self, dimensions: Optional[int] = None, use_cache: bool = True):
+        """
+        Args:
+            dimensions(int): size of the returned vectors. Values below 768 use
+                Matryoshka truncation; defaults to $EMBEDDING_DIMENSIONS or 768.
+            use_cache(bool): look vectors up in the on-disk embedding cache
+                before running the model.
+        """
         self.id: str = 'nomic-ai/nomic-embed-text-v1.5'
-   
-    def get_embedding(self, text: str):
-        """Get embedding for text and return as Python list."""
-        tokenizer = AutoTokenizer.from_pretrained(self.id)
-        model = AutoModel.from_pretrained(self.id, trust_remote_code=True)
-        model.eval()
-        
-        encoded_input = tokenizer(text, padding=True, truncation=True, return_tensors='pt')
-        
-        with torch.no_grad():
+
+        if dimensions is None:
+            dimensions = int(os.getenv("EMBEDDING_DIMENSIONS", MAX_DIMENSIONS))
+        if not MIN_DIMENSIONS <= dimensions <= MAX_DIMENSIONS:
+            raise ValueError(
+                f"dimensions must be between {MIN_DIMENSIONS} and {MAX_DIMENSIONS}, got {dimensions}."
+            )
+        # PgVector sizes its embedding column from this attribute.
+        self.dimensions = dimensions
+        self.cache: Optional[EmbeddingCache] = get_embedding_cache() if use_cache else None
+
+    def warmup(self):
+        """Load the tokenizer and model ahead of the first request."""
+        load_model(self.id)
+        return self
+
+    def _embed_batch(self, features: List[Dict[str, Any]]):
+        """
+        Pad one batch of tokenized inputs and run the model on it.
+        Args:
+            features(list): tokenizer outputs, one dict per text.
+        """
+        tokenizer, model = load_model(self.id)
+        encoded_input = tokenizer.pad(features, padding=True, return_tensors='pt')
+
+        with torch.inference_mode():
             model_output = model(**encoded_input)
-        
-        emb = model_output.last_hidden_state.mean(dim=1).squeeze()
+
+        # Masked mean pooling: average only the real tokens so padding does not dilute shorter texts.
+        mask = encoded_input['attention_mask'].unsqueeze(-1).to(model_output.last_hidden_state.dtype)
+        summed = (model_output.last_hidden_state * mask).sum(dim=1)
+        emb = summed / mask.sum(dim=1).clamp(min=1e-9)
+
+        if self.dimensions < emb.shape[1]:
+            # Matryoshka truncation: layer-norm the full vector, then keep the prefix.
+            emb = F.layer_norm(emb, normalized_shape=(emb.shape[1],))
+            emb = emb[:, :self.dimensions]
+        emb = F.normalize(emb, p=2, dim=1)
         return emb.detach().cpu().numpy().tolist()
-    
-    def get_embedding_and_usage(self, text: str):
-        """Get embedding with usage statistics."""
-        tokenizer = AutoTokenizer.from_pretrained(self.id)
-        model = AutoModel.from_pretrained(self.id, trust_remote_code=True)
-        model.eval()
-        
-        encoded_input = tokenizer(text, padding=True, truncation=True, return_tensors='pt')
-        
-        with torch.no_grad():
-            model_output = model(**encoded_input)
 
-        emb = model_output.last_hidden_state.mean(dim=1).squeeze()
-        embedding = emb.detach().cpu().numpy().tolist()
-        
-        usage_data = {
-            "tokens": len(encoded_input['input_ids'][0]),
-            "input_length": len(text),
-        }
+    def _run_model(self, texts: List[str], batch_size: int):
+        """
+        Embed texts with batched forward passes.
+        Inputs are sorted by token length before batching so each batch pads
+        to a similar length; results are returned in the original order.
+        Args:
+            texts(list): texts to embed.
+            batch_size(int): number of texts per forward pass.
+        Returns:
+            tuple: embeddings and token counts, both in input order.
+        """
+        tokenizer, _ = load_model(self.id)
+        encoded = tokenizer(list(texts), truncation=True)
+        keys = list(encoded.keys())
+        lengths = [len(ids) for ids in encoded['input_ids']]
+        order = sorted(range(len(texts)), key=lambda i: lengths[i])
+
+        embeddings: List[Optional[List[float]]] = [None] * len(texts)
+        for start in range(0, len(order), batch_size):
+            batch = order[start:start + batch_size]
+            features = [{key: encoded[key][i] for key in keys} for i in batch]
+            for i, emb in zip(batch, self._embed_batch(features)):
+                embeddings[i] = emb
+        return embeddings, lengths
+
+    def get_embeddings_and_usage(self, texts: List[str], batch_size: int = 32):
+        """
+        Embed many texts, running the model only for texts missing from the cache.
+        Args:
+            texts(list): texts to embed.
+            batch_size(int): number of texts per forward pass.
+        """
+        if not texts:
+            return [], []
+
+        hashes = [content_hash(text) for text in texts]
+        found = self.cache.get_many(self.id, self.dimensions, hashes) if self.cache else {}
+
+        missing: Dict[str, str] = {}
+        for hash_, text in zip(hashes, texts):
+            if hash_ not in found and hash_ not in missing:
+                missing[hash_] = text
 
-        return embedding, usage_data
\ No newline at end of file
+        if missing:
+            embeddings, lengths = self._run_model(list(missing.values()), batch_size)
+            computed = dict(zip(missing.keys(), zip(embeddings, lengths)))
+            if self.cache:
+                self.cache.put_many(self.id, self.dimensions, computed)
+            found.update(computed)
+
+        embeddings = [found[hash_][0] for hash_ in hashes]
+        usage = [
+            {"tokens": found[hash_][1], "input_length": len(text)}
+            for hash_, text in zip(hashes, texts)
+        ]
+        return embeddings, usage
+
+    def get_embeddings(self, texts: List[str], batch_size: int = 32):
+        """
+        Get embeddings for many texts and return them as Python lists.
+        Args:
+            texts(list): texts to embed.
+            batch_size(int): number of texts per forward pass.
+        """
+        embeddings, _ = self.get_embeddings_and_usage(texts, batch_size=batch_size)
+        return embeddings
+
+    def get_embedding(self, text: str):
+        """Get embedding for text and return as Python list."""
+        return self.get_embeddings([text])[0]
+
+    def get_embedding_and_usage(self, text: str):
+        """Get embedding with usage statistics."""
+        embeddings, usage = self.get_embeddings_and_usage([text])
+        return embeddings[0], usage[0]
@@ -0,0 +1,84 @@
+# pdf_extract.py
+# -------------------------------------------------------------
+# Page extraction that can run in worker processes.  Kept free of
+# heavy imports so spawned workers start quickly.
+# -------------------------------------------------------------
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional, Tuple
+
+import fitz
+
+# Large files are split into ranges of this many pages per task.
+PAGES_PER_TASK = 50
+
+
+def default_workers() -> int:
+    """Pool size from $PDF_EXTRACT_WORKERS, falling back to the CPU count."""
+    return int(os.getenv("PDF_EXTRACT_WORKERS", 0)) or os.cpu_count() or 1
+
+
+def page_count(pdf_path: str) -> int:
+    """Number of pages in a PDF."""
+    with fitz.open(pdf_path) as doc:
+        return len(doc)
+
+
+def extract_page_range(pdf_path: str, start: int, stop: int) -> List[Tuple[int, str]]:
+    """
+    Extract the text of pages [start, stop) of a PDF.
+    Args:
+        pdf_path(str): path to the PDF.
+        start(int): first page index.
+        stop(int): page index to stop before.
+    Returns:
+        list: (page index, page text) for each page in the range.
+    """
+    with fitz.open(pdf_path) as doc:
+        return [(pnum, doc[pnum].get_text()) for pnum in range(start, min(stop, len(doc)))]
+
+
+def iter_pages_parallel(
+    pdf_files: List[str],
+    workers: Optional[int] = None,
+    pages_per_task: int = PAGES_PER_TASK,
+) -> Iterator[Tuple[str, int, int, str]]:
+    """
+    Extract pages on a process pool and yield them in file and page order.
+    Files are fanned out to workers and large files are split into page
+    ranges; at most two tasks per worker are in flight so results do not
+    pile up ahead of the consumer.
+    Args:
+        pdf_files(list): paths of the PDFs to read.
+        workers(int): pool size; defaults to $PDF_EXTRACT_WORKERS or the CPU count.
+        pages_per_task(int): pages extracted per task.
+    Yields:
+        tuple: (path, page count, page index, page text).
+    """
+    workers = workers or default_workers()
+
+    def tasks():
+        for pdf_str in pdf_files:
+            count = page_count(pdf_str)
+            for start in range(0, count, pages_per_task):
+                yield pdf_str, count, start, start + pages_per_task
+
+    # "spawn" avoids forking a process that already runs torch and DB threads.
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+        in_flight = deque()
+        for pdf_str, count, start, stop in tasks():
+            in_flight.append((pdf_str, count, executor.submit(extract_page_range, pdf_str, start, stop)))
+            if len(in_flight) >= workers * 2:
+                yield from _drain_one(in_flight)
+        while in_flight:
+            yield from _drain_one(in_flight)
+
+
+def _drain_one(in_flight: deque) -> Iterator[Tuple[str, int, int, str]]:
+    """Wait for the oldest task and yield its pages."""
+    pdf_str, count, future = in_flight.popleft()
+    for pnum, page_text in future.result():
+        yield pdf_str, count, pnum, page_text
@@ -0,0 +1,205 @@
+# response_cache.py
+# -------------------------------------------------------------
+# Semantic cache of agent answers.  A prompt is embedded and compared
+# with earlier prompts asked in the same scope (provider, model, tool,
+# document version, tenant, session); a close enough match returns the stored
+# answer instead of calling the LLM again.
+# -------------------------------------------------------------
+import hashlib
+import json
+import os
+import threading
+from datetime import timedelta
+from typing import Dict, List, Optional, Tuple
+
+from pgvector.sqlalchemy import Vector
+from sqlalchemy import Column, DateTime, MetaData, String, Table, Text, func, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import sessionmaker
+
+from agno.knowledge.embedder.base import Embedder
+from agno.utils.log import log_debug, log_info
+
+from db_engine import get_engine
+from db_schema import check_vector_dimensions, ensure_schema
+from nomic_ai import NomicAIEmbedder
+
+
+def scope_key(
+    provider: str,
+    model_id: str,
+    tool: Optional[str] = None,
+    document: Optional[str] = None,
+    document_version: Optional[str] = None,
+    tenant: Optional[str] = None,
+    session: Optional[str] = None,
+) -> str:
+    """
+    Hash of everything besides the prompt that an answer depends on.  The
+    session stands in for the chat history and memory the agent read.
+    """
+    parts = [provider.lower(), model_id, tool, document, document_version, tenant, session]
+    return hashlib.sha256(json.dumps(parts).encode("utf-8")).hexdigest()
+
+
+class SemanticResponseCache:
+    """
+    Prompt -> answer cache in a pgvector table.  Lookups are always inside
+    one scope, so they use the btree index on `scope_key` and rank that
+    handful of rows exactly; no ANN index is needed.
+    Entries expire after `ttl_seconds` and can be dropped per document
+    and tenant when a document is uploaded again.
+    """
+
+    def __init__(
+        self,
+        embedder: Optional[Embedder] = None,
+        db_engine: Optional[Engine] = None,
+        table_name: str = "ResponseCache",
+        schema: str = "ai",
+        threshold: Optional[float] = None,
+        ttl_seconds: Optional[float] = None,
+    ):
+        self.embedder = embedder or NomicAIEmbedder()
+        self.db_engine = db_engine or get_engine()
+        self.table_name = table_name
+        self.schema = schema
+        # Cosine similarity a cached prompt needs to be reused; high, so only rephrasings match.
+        self.threshold = threshold if threshold is not None else float(os.getenv("RESPONSE_CACHE_THRESHOLD", 0.95))
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else float(os.getenv("RESPONSE_CACHE_TTL", 86400))
+        self.Session = sessionmaker(bind=self.db_engine)
+
+        self.table = Table(
+            self.table_name,
+            MetaData(schema=self.schema),
+            Column("id", String, primary_key=True),
+            Column("scope_key", String, nullable=False, index=True),
+            Column("document", String, index=True),
+            Column("tenant", String, index=True),
+            Column("prompt", Text, nullable=False),
+            Column("response", Text, nullable=False),
+            Column("embedding", Vector(self.embedder.dimensions)),
+            Column("created_at", DateTime(timezone=True), server_default=func.now()),
+            Column("expires_at", DateTime(timezone=True), index=True),
+        )
+
+        self._stats_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def create(self):
+        """Create the cache table; runs once per process."""
+        ensure_schema(self.db_engine, f"response_cache:{self.table_name}", [
+            (1, "create table", self._create_table),
+        ], check=lambda: check_vector_dimensions(
+            self.db_engine, self.schema, self.table_name, self.embedder.dimensions
+        ))
+
+    def _create_table(self):
+        with self.Session() as session, session.begin():
+            session.execute(text(f"CREATE SCHEMA IF NOT EXISTS {self.schema};"))
+        self.table.create(self.db_engine, checkfirst=True)
+
+    def lookup(self, prompt: str, scope: str) -> Tuple[Optional[str], List[float]]:
+        """
+        Find a cached answer to a prompt close to `prompt` in `scope`.
+        Args:
+            prompt(str): the user message.
+            scope(str): key from `scope_key`.
+        Returns:
+            tuple: (cached answer or None, prompt embedding to pass to `store`).
+        """
+        self.create()
+        embedding = self.embedder.get_embedding(prompt)
+        sql = text(f"""
+            SELECT response, 1 - (embedding <=> CAST(:embedding AS vector)) AS similarity
+            FROM "{self.schema}"."{self.table_name}"
+            WHERE scope_key = :scope AND expires_at > now()
+            ORDER BY embedding <=> CAST(:embedding AS vector)
+            LIMIT 1
+        """)
+        with self.Session() as session:
+            row = session.execute(sql, {"embedding": str(list(embedding)), "scope": scope}).first()
+
+        hit = row is not None and row.similarity >= self.threshold
+        with self._stats_lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        if hit:
+            log_debug(f"Response cache hit (similarity {row.similarity:.3f})")
+            return row.response, embedding
+        return None, embedding
+
+    def store(
+        self,
+        prompt: str,
+        response: str,
+        scope: str,
+        embedding: Optional[List[float]] = None,
+        document: Optional[str] = None,
+        tenant: Optional[str] = None,
+    ):
+        """
+        Cache `response` as the answer to `prompt` in `scope`, and drop the
+        scope's expired entries while at it.
+        Args:
+            prompt(str): the user message.
+            response(str): the agent's answer.
+            scope(str): key from `scope_key`.
+            embedding(list): prompt embedding returned by `lookup`, if any.
+            document(str): document the answer was based on, for invalidation.
+            tenant(str): tenant (user) the answer belongs to, for invalidation.
+        """
+        if not response:
+            return
+        self.create()
+        if embedding is None:
+            embedding = self.embedder.get_embedding(prompt)
+
+        values = {
+            "id": hashlib.sha256(f"{scope}\x1f{prompt}".encode("utf-8")).hexdigest(),
+            "scope_key": scope,
+            "document": document,
+            "tenant": tenant,
+            "prompt": prompt,
+            "response": response,
+            "embedding": embedding,
+            "expires_at": func.now() + timedelta(seconds=self.ttl_seconds),
+        }
+        stmt = postgresql.insert(self.table).values(**values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["id"],
+            set_={**values, "created_at": func.now()},
+        )
+        with self.Session() as session, session.begin():
+            session.execute(stmt)
+            session.execute(
+                self.table.delete().where(self.table.c.scope_key == scope, self.table.c.expires_at <= func.now())
+            )
+
+    def invalidate(self, document: Optional[str] = None, tenant: Optional[str] = None) -> int:
+        """
+        Drop cached answers about `document`, only for `tenant` when given.
+        Returns:
+            int: number of entries removed.
+        """
+        if document is None and tenant is None:
+            raise ValueError("invalidate needs a document or a tenant")
+        self.create()
+        stmt = self.table.delete()
+        if document is not None:
+            stmt = stmt.where(self.table.c.document == document)
+        if tenant is not None:
+            stmt = stmt.where(self.table.c.tenant == tenant)
+        with self.Session() as session, session.begin():
+            removed = session.execute(stmt).rowcount
+        log_info(f"Response cache: invalidated {removed} entries (document={document}, tenant={tenant})")
+        return removed
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters."""
+        with self._stats_lock:
+            return {"hits": self.hits, "misses": self.misses}
@@ -0,0 +1,76 @@
+# Shared test setup.
+#
+# Tests that need Postgres with pgvector run against $TEST_DATABASE_URL
+# and are skipped when it is unset.  That database is disposable: the
+# "ai" schema is dropped before each such test.
+import hashlib
+import math
+import os
+import re
+import sys
+from dataclasses import dataclass
+from typing import Optional
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+if TEST_DATABASE_URL:
+    os.environ["DATABASE_URL"] = TEST_DATABASE_URL
+# No on-disk embedding cache during tests.
+os.environ.setdefault("EMBEDDING_CACHE_PATH", "")
+
+from agno.knowledge.embedder.base import Embedder
+
+
+@dataclass
+class HashEmbedder(Embedder):
+    """Bag-of-words vectors: texts that share words are close, and no model is loaded."""
+
+    id: str = "test-hash-embedder"
+    dimensions: Optional[int] = 64
+
+    def get_embedding(self, text):
+        vector = [0.0] * self.dimensions
+        for word in re.findall(r"\w+", text.lower()):
+            vector[int(hashlib.md5(word.encode()).hexdigest(), 16) % self.dimensions] += 1.0
+        norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+        return [value / norm for value in vector]
+
+    def get_embedding_and_usage(self, text):
+        return self.get_embedding(text), None
+
+    def warmup(self):
+        return self
+
+
+@pytest.fixture
+def embedder():
+    return HashEmbedder()
+
+
+@pytest.fixture
+def database():
+    """The shared engine on an empty "ai" schema."""
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    from sqlalchemy import text
+
+    import db_schema
+    from db_engine import get_engine
+
+    engine = get_engine()
+    with engine.begin() as conn:
+        conn.execute(text("DROP SCHEMA IF EXISTS ai CASCADE"))
+    db_schema._ready.clear()
+    return engine
+
+
+@pytest.fixture
+def knowledge_embedder(monkeypatch):
+    """Make KnowledgeBaseOperation embed with HashEmbedder instead of the Nomic model."""
+    import agent_knowledge_base
+
+    monkeypatch.setattr(agent_knowledge_base, "NomicAIEmbedder", HashEmbedder)
+    return HashEmbedder
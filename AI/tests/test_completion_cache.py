@@ -0,0 +1,27 @@
+from llms.completion_cache import CompletionCache
+
+
+def test_disk_puts_below_the_limit_do_not_count_rows(tmp_path):
+    cache = CompletionCache(max_entries=2, path=str(tmp_path / "completions.sqlite3"), max_disk_entries=100)
+    statements = []
+    cache._conn.set_trace_callback(statements.append)
+
+    for i in range(50):
+        cache.put(f"k{i}", f"answer {i}")
+    cache.put("k0", "answer 0 again")
+
+    assert not [sql for sql in statements if "COUNT" in sql]
+    assert cache._disk_count == 50
+
+
+def test_disk_overflow_evicts_the_least_recently_used(tmp_path):
+    path = str(tmp_path / "completions.sqlite3")
+    cache = CompletionCache(max_entries=1, path=path, max_disk_entries=10)
+    for i in range(10):
+        cache.put(f"k{i}", f"answer {i}")
+    cache.put("k10", "answer 10")
+
+    (rows,) = cache._conn.execute("SELECT COUNT(*) FROM completions").fetchone()
+    assert rows == cache._disk_count == 9
+    assert CompletionCache(max_entries=1, path=path)._disk_count == 9
+    assert cache.get("k10") == "answer 10"
@@ -0,0 +1,38 @@
+import sqlite3
+
+import pytest
+from sqlalchemy import create_engine, exc, text
+
+from conftest import TEST_DATABASE_URL
+from db_engine import TimedQueuePool, disable_statement_timeout
+
+
+def test_only_pool_exhaustion_counts_as_a_timeout():
+    pool = TimedQueuePool(lambda: sqlite3.connect(":memory:"), pool_size=1, max_overflow=0, timeout=0.01)
+    held = pool.connect()
+    with pytest.raises(exc.TimeoutError):
+        pool.connect()
+    held.close()
+    assert pool.timeouts == 1
+
+    def refuse():
+        raise sqlite3.OperationalError("connection refused")
+
+    failing = TimedQueuePool(refuse, pool_size=1, max_overflow=0, timeout=0.01)
+    with pytest.raises(Exception):
+        failing.connect()
+    assert failing.timeouts == 0
+
+
+def test_disable_statement_timeout_is_local_to_the_transaction():
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    engine = create_engine(TEST_DATABASE_URL, connect_args={"options": "-c statement_timeout=50"})
+    try:
+        with engine.begin() as conn:
+            disable_statement_timeout(conn)
+            conn.execute(text("SELECT pg_sleep(0.2)"))
+        with pytest.raises(exc.OperationalError), engine.begin() as conn:
+            conn.execute(text("SELECT pg_sleep(0.2)"))
+    finally:
+        engine.dispose()
@@ -0,0 +1,25 @@
+from dataclasses import dataclass
+from typing import Optional
+
+import pytest
+
+from conftest import HashEmbedder
+from memory_store import MemoryStore
+
+
+@dataclass
+class WideEmbedder(HashEmbedder):
+    dimensions: Optional[int] = 128
+
+
+def test_changed_embedding_size_fails_fast(database):
+    MemoryStore(table_name="ChatMemoryTest", embedder=HashEmbedder()).init_table()
+
+    import db_schema
+    db_schema._ready.clear()
+    store = MemoryStore(table_name="ChatMemoryTest", embedder=WideEmbedder())
+    with pytest.raises(ValueError, match="holds 64-dimension vectors but the embedder produces 128"):
+        store.init_table()
+    # Still not ready: later calls fail the same way instead of at query time.
+    with pytest.raises(ValueError):
+        store.add_message("user", "hello", session_id="s1")
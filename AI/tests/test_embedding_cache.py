@@ -0,0 +1,40 @@
+from embedding_cache import EmbeddingCache
+
+
+def put(cache, start, count):
+    cache.put_many("model", 2, {f"h{i}": ([float(i), 0.0], 1) for i in range(start, start + count)})
+
+
+def test_puts_below_the_limit_do_not_count_rows(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "cache.sqlite3"), max_entries=100)
+    statements = []
+    cache._conn.set_trace_callback(statements.append)
+
+    for start in range(0, 50, 5):
+        put(cache, start, 5)
+
+    assert not [sql for sql in statements if "COUNT" in sql]
+    assert cache._count == 50
+
+
+def test_overflow_evicts_the_least_recently_used(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "cache.sqlite3"), max_entries=10)
+    put(cache, 0, 10)
+    cache.get_many("model", 2, ["h0"])
+    put(cache, 10, 1)
+
+    (rows,) = cache._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+    assert rows == cache._count == 9
+    kept = cache.get_many("model", 2, [f"h{i}" for i in range(11)])
+    assert {"h0", "h10"} <= set(kept) and len(kept) == 9
+
+
+def test_count_survives_reopening_and_repeated_puts(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    put(EmbeddingCache(path), 0, 5)
+
+    cache = EmbeddingCache(path)
+    put(cache, 3, 5)
+
+    assert cache._count == 8
+    assert cache.get_many("model", 2, ["h4"])["h4"] == ([4.0, 0.0], 1)
@@ -0,0 +1,156 @@
+import asyncio
+import json
+import logging
+import random
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from llms.base_provider import BaseProvider
+from llms.langextract_provider import CustomOPProvider
+
+
+class EchoClient:
+    def __init__(self):
+        self.closed = False
+
+    async def close(self):
+        self.closed = True
+
+
+class EchoProvider(BaseProvider):
+    """Answers with the messages it was sent, wrapped as an extraction; no network."""
+
+    system_prompt = "echo"
+    temperature = 0.0
+
+    def __init__(self):
+        self.clients = []
+
+    def getProviderName(self):
+        return "echo"
+
+    def getModels(self):
+        return ["echo"]
+
+    def _newAsyncClient(self):
+        client = EchoClient()
+        self.clients.append(client)
+        return client
+
+    async def acomplete(self, messages):
+        self.getAsyncClient()
+        # Finish out of order, so interleaved state would show.
+        await asyncio.sleep(random.uniform(0, 0.02))
+        extraction = {"extraction_class": "messages", "extraction_text": json.dumps(messages), "attributes": {}}
+        return f"<|EXTRACT_START|>{json.dumps({'extractions': [extraction]})}<|EXTRACT_END|>", None
+
+
+def sent(output):
+    """The messages an EchoProvider reply says it was sent."""
+    body = re.search(r"<\|EXTRACT_START\|>(.*?)<\|EXTRACT_END\|>", output, re.DOTALL).group(1)
+    return json.loads(json.loads(body)["extractions"][0]["extraction_text"])
+
+
+def request(prompt, system_prompt="You are a strict json field extraction model"):
+    return [{"role": "system", "content": system_prompt}, {"role": "user", "content": prompt}]
+
+
+def echo_model():
+    model = CustomOPProvider("echo-model", api_key="unused", use_completion_cache=False)
+    model._provider = EchoProvider()
+    return model
+
+
+def test_batches_share_one_loop_and_close_its_client():
+    model = echo_model()
+    model._run_batch(["a", "b"], "system")
+    loop = model._loop
+
+    async def from_another_loop():
+        return model._run_batch(["c"], "system")
+
+    asyncio.run(from_another_loop())
+
+    assert model._loop is loop
+    assert len(model._provider.clients) == 1
+
+    model.close()
+    assert model._provider.clients[0].closed
+    assert loop.is_closed()
+
+
+def test_concurrent_acomplete_calls_keep_their_own_messages():
+    model = echo_model()
+    prompts = [f"prompt {i}" for i in range(40)]
+    try:
+        outputs = model._run_batch(prompts, "system")
+    finally:
+        model.close()
+
+    assert [sent(output) for output in outputs] == [request(prompt, "system") for prompt in prompts]
+    assert not getattr(model._provider, "messages", [])
+
+
+def test_threads_sharing_one_model_get_their_own_replies():
+    model = echo_model()
+    batches = [[f"thread {t} prompt {i}" for i in range(10)] for t in range(6)]
+
+    def extract(prompts):
+        return [outputs[0].output for outputs in model.infer(prompts)]
+
+    try:
+        with ThreadPoolExecutor(max_workers=len(batches)) as executor:
+            results = list(executor.map(extract, batches))
+    finally:
+        model.close()
+
+    for prompts, outputs in zip(batches, results):
+        assert [sent(output) for output in outputs] == [request(prompt) for prompt in prompts]
+
+
+class FailingProvider(EchoProvider):
+    """Fails the prompt "fail" at once; every other prompt takes a while."""
+
+    def __init__(self):
+        super().__init__()
+        self.finished = []
+
+    async def acomplete(self, messages):
+        prompt = messages[-1]["content"]
+        if prompt == "fail":
+            raise RuntimeError("quota exceeded")
+        await asyncio.sleep(0.2)
+        self.finished.append(prompt)
+        return prompt, None
+
+
+def test_first_failure_cancels_the_rest_of_the_batch():
+    model = echo_model()
+    provider = model._provider = FailingProvider()
+    try:
+        with pytest.raises(RuntimeError, match="quota exceeded"):
+            model._run_batch(["slow 1", "fail", "slow 2"], "system")
+        # Give any request that survived the failure time to finish.
+        model._run_batch(["after"], "system")
+    finally:
+        model.close()
+
+    assert provider.finished == ["after"]
+
+
+class UnclosableClient(EchoClient):
+    async def close(self):
+        raise OSError("connection reset")
+
+
+def test_failure_to_close_the_client_is_logged(caplog):
+    model = echo_model()
+    model._provider._newAsyncClient = UnclosableClient
+    model._run_batch(["a"], "system")
+
+    with caplog.at_level(logging.WARNING):
+        model.close()
+
+    assert "Failed to close the async client of echo: connection reset" in caplog.text
@@ -0,0 +1,13 @@
+import main
+
+
+def test_lifespan_runs_startup_and_shutdown_hooks(monkeypatch):
+    from fastapi.testclient import TestClient
+
+    calls = []
+    for hook in ("warmup_embedder", "bootstrap_schema", "flush_memory_writer", "stop_embedding_executor"):
+        monkeypatch.setattr(main, hook, lambda hook=hook: calls.append(hook))
+
+    with TestClient(main.app):
+        assert calls == ["warmup_embedder", "bootstrap_schema"]
+    assert calls[2:] == ["flush_memory_writer", "stop_embedding_executor"]
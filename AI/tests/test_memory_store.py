@@ -0,0 +1,45 @@
+import pytest
+from sqlalchemy import text
+
+from memory_store import MemoryStore
+
+
+@pytest.fixture
+def store(database, embedder):
+    return MemoryStore(table_name="ChatMemoryTest", embedder=embedder, half_life_hours=0)
+
+
+def test_small_session_gets_its_rows_back_from_a_large_table(store):
+    # 40 busy sessions whose turns are all close to the query ...
+    store.add_messages([
+        {"role": "user", "content": f"question {turn} about invoices, shipping and refunds", "session_id": f"busy-{session}"}
+        for session in range(40)
+        for turn in range(100)
+    ], batch_size=1000)
+    # ... and one session, a small share of the table, whose turns are not.
+    store.add_messages([
+        {"role": "user", "content": f"my parcel number {turn} to Oslo is late", "session_id": "small"}
+        for turn in range(400)
+    ], batch_size=1000)
+    with store.Session() as session, session.begin():
+        session.execute(text(f"ANALYZE {store._qualified_table()}"))
+
+    hits = store.recall("invoices shipping refunds", k=5, session_id="small")
+    assert len(hits) == 5
+    assert all("Oslo" in hit for hit in hits)
+
+
+def test_recall_is_limited_to_the_scope(store):
+    store.add_message("user", "my favourite colour is green", session_id="a", user_id="alice")
+    store.add_message("user", "my favourite colour is red", session_id="b", user_id="bob")
+
+    assert store.recall("favourite colour", session_id="a") == ["user: my favourite colour is green"]
+    assert store.recall("favourite colour", user_id="bob") == ["user: my favourite colour is red"]
+    assert store.recall("favourite colour", session_id="a", user_id="bob") == []
+
+
+def test_recent_window_is_not_shared_across_users(store):
+    store.add_message("user", "my card ends in 4242", session_id="s1", user_id="alice")
+
+    assert store.recent("s1", user_id="alice") == ["user: my card ends in 4242"]
+    assert store.recent("s1", user_id="mallory") == []
@@ -0,0 +1,60 @@
+import asyncio
+import threading
+
+import pytest
+from agno.run import RunContext
+from agno.tools.function import Function
+
+import memory_tool
+
+
+class RecordingMemory:
+    def __init__(self):
+        self.calls = []
+
+    def recent(self, session_id, n, user_id=None):
+        self.calls.append(("recent", session_id, user_id))
+        self.thread = threading.current_thread()
+        return ["user: earlier turn"]
+
+    def recall(self, query, k, session_id=None, user_id=None):
+        self.calls.append(("recall", session_id, user_id))
+        return ["user: relevant turn"]
+
+
+@pytest.fixture
+def tool(monkeypatch):
+    monkeypatch.setattr(memory_tool, "MemoryStore", RecordingMemory)
+    return memory_tool.MemoryTool()
+
+
+@pytest.mark.parametrize("method", ["recall", "arecall"])
+def test_scope_ids_are_not_tool_arguments(tool, method):
+    properties = Function.from_callable(getattr(tool, method)).parameters["properties"]
+    assert set(properties) == {"query", "mode"}
+
+
+def test_recall_uses_the_run_context_scope(tool):
+    context = RunContext(run_id="run", session_id="s1", user_id="alice")
+    result = tool.recall("what did I say?", run_context=context)
+
+    assert tool.memory.calls == [("recent", "s1", "alice"), ("recall", "s1", "alice")]
+    assert "earlier turn" in result and "relevant turn" in result
+
+
+def test_recall_without_a_run_context_searches_nothing(tool):
+    assert tool.recall("what did I say?") == "No relevant memory found."
+    assert tool.memory.calls == []
+
+
+def test_async_recall_runs_off_the_event_loop(tool):
+    context = RunContext(run_id="run", session_id="s1", user_id="alice")
+
+    async def call():
+        entrypoint = tool.get_async_functions()["recall"].entrypoint
+        return await entrypoint("what did I say?", run_context=context)
+
+    result = asyncio.run(call())
+
+    assert "earlier turn" in result
+    assert tool.memory.thread.name.startswith("embedding")
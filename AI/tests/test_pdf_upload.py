@@ -0,0 +1,69 @@
+import fitz
+from sqlalchemy import text
+
+
+def write_pdf(path, pages):
+    doc = fitz.open()
+    for page_text in pages:
+        doc.new_page().insert_text((72, 72), page_text)
+    doc.save(str(path))
+    doc.close()
+
+
+def test_reupload_replaces_chunks_of_previous_version(database, knowledge_embedder, monkeypatch, tmp_path):
+    monkeypatch.setenv("PDF_EXTRACT_WORKERS", "1")
+    from _pdf_ import PDFKnowledgeBase
+
+    path = tmp_path / "contract.pdf"
+    write_pdf(path, ["The termination fee is ten thousand dollars.", "Notice period: thirty days."])
+    pdf_tool = PDFKnowledgeBase()
+    pdf_tool.pdf_upload(str(path))
+
+    write_pdf(path, ["The termination fee is twenty thousand dollars."])
+    pdf_tool.pdf_upload(str(path))
+
+    with database.connect() as conn:
+        rows = conn.execute(text(
+            'SELECT content FROM ai."Agent_knowledge" WHERE meta_data->>\'source\' = :source'
+        ), {"source": str(path)}).fetchall()
+    assert [row.content for row in rows] == ["The termination fee is twenty thousand dollars."]
+
+    results = pdf_tool.search("termination fee notice period")
+    assert results
+    assert not any("ten thousand" in result or "thirty days" in result for result in results)
+
+
+def test_unchanged_file_is_not_ingested_again(database, knowledge_embedder, monkeypatch, tmp_path):
+    monkeypatch.setenv("PDF_EXTRACT_WORKERS", "1")
+    from _pdf_ import PDFKnowledgeBase
+
+    path = tmp_path / "contract.pdf"
+    write_pdf(path, ["The termination fee is ten thousand dollars."])
+    pdf_tool = PDFKnowledgeBase()
+    pdf_tool.pdf_upload(str(path))
+
+    ingested = []
+    monkeypatch.setattr(pdf_tool.ak_tool, "ingest", lambda documents, **kwargs: ingested.extend(documents) or 0)
+    pdf_tool.pdf_upload(str(path))
+    assert ingested == []
+
+
+def test_edit_matching_another_file_replaces_old_chunks(database, knowledge_embedder, monkeypatch, tmp_path):
+    monkeypatch.setenv("PDF_EXTRACT_WORKERS", "1")
+    from _pdf_ import PDFKnowledgeBase
+
+    first, second = tmp_path / "first.pdf", tmp_path / "second.pdf"
+    write_pdf(first, ["The termination fee is ten thousand dollars."])
+    write_pdf(second, ["The governing law is Norwegian."])
+    pdf_tool = PDFKnowledgeBase()
+    pdf_tool.pdf_upload(str(first))
+    pdf_tool.pdf_upload(str(second))
+
+    second.write_bytes(first.read_bytes())
+    pdf_tool.pdf_upload(str(second))
+
+    with database.connect() as conn:
+        rows = conn.execute(text(
+            'SELECT content FROM ai."Agent_knowledge" WHERE meta_data->>\'source\' = :source'
+        ), {"source": str(second)}).fetchall()
+    assert [row.content for row in rows] == ["The termination fee is ten thousand dollars."]
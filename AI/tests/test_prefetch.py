@@ -0,0 +1,40 @@
+import threading
+from contextlib import closing
+
+import pytest
+
+from agent_knowledge_base import _batched, _prefetch
+
+
+def test_failing_consumer_stops_the_producer_and_closes_the_source():
+    closed = threading.Event()
+
+    def pages():
+        try:
+            for page in range(10_000):
+                yield page
+        finally:
+            closed.set()
+
+    threads = threading.active_count()
+    with pytest.raises(RuntimeError):
+        with closing(_prefetch(_batched(pages(), 4), maxsize=2)) as batches:
+            for batch in batches:
+                if batch[0] >= 8:
+                    raise RuntimeError("embedding failed")
+
+    assert closed.is_set()
+    assert threading.active_count() == threads
+
+
+def test_prefetch_yields_everything_in_order():
+    assert list(_prefetch(iter(range(100)), maxsize=3)) == list(range(100))
+
+
+def test_producer_errors_reach_the_consumer():
+    def pages():
+        yield 1
+        raise ValueError("bad page")
+
+    with pytest.raises(ValueError):
+        list(_prefetch(pages(), maxsize=2))
@@ -0,0 +1,25 @@
+import main
+from response_cache import SemanticResponseCache
+
+
+def prompt(**scope):
+    return main.Prompt(
+        message="What is the notice period in the contract?", provider="openai",
+        api_key="unused", id="gpt-4o", tool="", tool_config={}, **scope,
+    )
+
+
+def test_answers_are_not_shared_between_sessions(database, embedder):
+    cache = SemanticResponseCache(embedder=embedder, db_engine=database)
+    first = main.response_cache_scope(prompt(session_id="a", user_id="alice"))
+    second = main.response_cache_scope(prompt(session_id="b", user_id="alice"))
+
+    cache.store("What is the notice period in the contract?", "Thirty days.", first["scope"])
+
+    assert cache.lookup("What is the notice period in the contract?", first["scope"])[0] == "Thirty days."
+    assert cache.lookup("What is the notice period in the contract?", second["scope"])[0] is None
+
+
+def test_prompts_without_a_session_or_user_are_not_cached():
+    assert main.response_cache_scope(prompt()) is None
+    assert main.response_cache_scope(prompt(user_id="alice")) is not None
@@ -0,0 +1,68 @@
+import asyncio
+import json
+from dataclasses import dataclass
+
+from agno.agent import Agent
+from agno.models.base import Model
+from agno.models.response import ModelResponse
+
+import main
+
+
+@dataclass
+class ScriptedModel(Model):
+    """Asks for one get_weather call, then answers from its result."""
+
+    id: str = "scripted"
+    name: str = "Scripted"
+    provider: str = "Scripted"
+
+    def invoke(self, *args, **kwargs):
+        raise NotImplementedError
+
+    async def ainvoke(self, *args, **kwargs):
+        raise NotImplementedError
+
+    def invoke_stream(self, *args, **kwargs):
+        raise NotImplementedError
+
+    def _parse_provider_response(self, response, **kwargs):
+        return response
+
+    def _parse_provider_response_delta(self, response):
+        return response
+
+    async def ainvoke_stream(self, messages, assistant_message, **kwargs):
+        if any(message.role == "tool" for message in messages):
+            yield ModelResponse(role="assistant", content="It is sunny in Oslo.")
+        else:
+            call = {"name": "get_weather", "arguments": json.dumps({"city": "Oslo"})}
+            yield ModelResponse(
+                role="assistant", tool_calls=[{"id": "call_1", "type": "function", "function": call}]
+            )
+
+
+def get_weather(city: str) -> str:
+    """Current weather for a city."""
+    return "sunny"
+
+
+def test_tool_calls_reach_the_sse_stream(monkeypatch):
+    saved = []
+    monkeypatch.setattr(main, "save_turn", lambda prompt, reply: saved.append(reply))
+    agent = Agent(model=ScriptedModel(), tools=[get_weather])
+    prompt = main.Prompt(
+        message="What is the weather in Oslo?", provider="openai", api_key="unused",
+        id="scripted", tool="", tool_config={}, use_cache=False,
+    )
+
+    async def collect():
+        return "".join([event async for event in main.stream_agent_events(agent, prompt)])
+
+    output = asyncio.run(collect())
+
+    assert 'event: tool_call_started\ndata: {"tool": "get_weather", "args": {"city": "Oslo"}}' in output
+    assert 'event: tool_call_completed\ndata: {"tool": "get_weather"}' in output
+    assert output.index("tool_call_completed") < output.index("event: token")
+    assert output.endswith('event: done\ndata: {"response": "It is sunny in Oslo."}\n\n')
+    assert saved == ["It is sunny in Oslo."]
@@ -0,0 +1,36 @@
+import hashlib
+
+from agno.knowledge.document import Document
+from agno.vectordb.pgvector import PgVector
+from sqlalchemy import text
+
+from vector_utils import bulk_upsert
+
+
+def test_bulk_upsert_overwrites_rows_written_by_pgvector(database, embedder):
+    vector_db = PgVector(table_name="upsert_ids", db_engine=database, embedder=embedder)
+    vector_db.create()
+    content = "Either party may terminate with thirty days notice."
+
+    # How the knowledge base wrote chunks before bulk_upsert.
+    vector_db.upsert(
+        content_hash=hashlib.sha256(content.encode("utf-8")).hexdigest(),
+        documents=[Document(content=content)],
+    )
+    bulk_upsert(vector_db, [Document(content=content)])
+
+    with database.connect() as conn:
+        count = conn.execute(text('SELECT count(*) FROM ai."upsert_ids"')).scalar()
+    assert count == 1
+
+
+def test_scope_columns_keep_equal_text_apart(database, embedder):
+    from memory_store import MemoryStore
+
+    store = MemoryStore(table_name="scoped_ids", embedder=embedder)
+    for session_id in ("a", "b", "a"):
+        store.add_message("user", "hello", session_id=session_id, user_id="u1")
+
+    with database.connect() as conn:
+        rows = conn.execute(text('SELECT session_id FROM ai."scoped_ids" ORDER BY session_id')).fetchall()
+    assert [row.session_id for row in rows] == ["a", "b"]
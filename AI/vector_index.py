@@ -0,0 +1,134 @@
+# vector_index.py
+# -------------------------------------------------------------
+# Approximate-nearest-neighbour index settings for the pgvector tables
+#
+#   python vector_index.py rebuild   # drop and rebuild both indexes
+# -------------------------------------------------------------
+import argparse
+import math
+import os
+from typing import Union
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session, sessionmaker
+
+from agno.utils.log import log_info
+from agno.vectordb.distance import Distance
+from agno.vectordb.pgvector import HNSW, Ivfflat, PgVector
+from db_engine import disable_statement_timeout
+
+# pgvector operator class for each distance.
+INDEX_OPS = {
+    Distance.cosine: "vector_cosine_ops",
+    Distance.l2: "vector_l2_ops",
+    Distance.max_inner_product: "vector_ip_ops",
+}
+
+
+def get_vector_index() -> Union[HNSW, Ivfflat]:
+    """
+    Build the index definition from the environment.
+    VECTOR_INDEX=hnsw (default) uses HNSW_M, HNSW_EF_CONSTRUCTION and
+    HNSW_EF_SEARCH.  VECTOR_INDEX=ivfflat uses IVFFLAT_PROBES and
+    IVFFLAT_LISTS; leaving IVFFLAT_LISTS unset sizes lists from the row
+    count when the index is built.
+    PgVector applies ef_search / probes with SET LOCAL on every search.
+    """
+    kind = os.getenv("VECTOR_INDEX", "hnsw").lower()
+    if kind == "hnsw":
+        return HNSW(
+            m=int(os.getenv("HNSW_M", 16)),
+            ef_construction=int(os.getenv("HNSW_EF_CONSTRUCTION", 200)),
+            ef_search=int(os.getenv("HNSW_EF_SEARCH", 40)),
+        )
+    if kind == "ivfflat":
+        lists = int(os.getenv("IVFFLAT_LISTS", 0))
+        return Ivfflat(
+            lists=lists or 100,
+            probes=int(os.getenv("IVFFLAT_PROBES", 10)),
+            dynamic_lists=not lists,
+        )
+    raise ValueError(f"Unsupported VECTOR_INDEX: {kind}")
+
+
+def apply_search_params(session: Session, index: Union[HNSW, Ivfflat], candidates: int = 0):
+    """
+    SET LOCAL the index's search parameters for raw-SQL searches, which do
+    not go through PgVector.search.  Call inside the search transaction.
+    Args:
+        session(Session): session with an open transaction.
+        index: the store's vector index definition.
+        candidates(int): minimum number of neighbours HNSW should return.
+    """
+    if isinstance(index, HNSW):
+        session.execute(text(f"SET LOCAL hnsw.ef_search = {max(index.ef_search, candidates)}"))
+    elif isinstance(index, Ivfflat):
+        session.execute(text(f"SET LOCAL ivfflat.probes = {index.probes}"))
+
+
+def create_vector_index(vector_db: PgVector, force_recreate: bool = False):
+    """
+    Create the HNSW / IVFFlat index on a store's embedding column if it is
+    missing.  Only the vector index: PgVector.optimize would also add a
+    full-text GIN index that none of our searches use.  The index keeps
+    PgVector's name, so indexes built by optimize() are found too.
+    Args:
+        vector_db(PgVector): store whose `vector_index` is built.
+        force_recreate(bool): drop and rebuild an existing index.
+    """
+    index = vector_db.vector_index
+    if index is None:
+        return
+    kind = "ivfflat" if isinstance(index, Ivfflat) else "hnsw"
+    name = index.name or f"{vector_db.table_name}_{kind}_index"
+    table = f'"{vector_db.schema}"."{vector_db.table_name}"'
+    ops = INDEX_OPS.get(vector_db.distance, "vector_cosine_ops")
+
+    with sessionmaker(bind=vector_db.db_engine)() as session, session.begin():
+        disable_statement_timeout(session)
+        for key, value in index.configuration.items():
+            session.execute(text("SELECT set_config(:key, :value, true)"), {"key": key, "value": str(value)})
+        if force_recreate:
+            session.execute(text(f'DROP INDEX IF EXISTS "{vector_db.schema}"."{name}"'))
+
+        if isinstance(index, Ivfflat):
+            lists = index.lists
+            if index.dynamic_lists:
+                # Same sizing as PgVector: rows / 1000, or sqrt(rows) past a million.
+                rows = session.execute(text(f"SELECT count(*) FROM {table}")).scalar()
+                lists = max(int(rows / 1000) if rows < 1_000_000 else int(math.sqrt(rows)), 1)
+            options = f"lists = {int(lists)}"
+        else:
+            options = f"m = {int(index.m)}, ef_construction = {int(index.ef_construction)}"
+        session.execute(text(
+            f'CREATE INDEX IF NOT EXISTS "{name}" ON {table} USING {kind} (embedding {ops}) WITH ({options})'
+        ))
+    log_info(f"Vector index {name} is in place")
+
+
+def drop_text_index(vector_db: PgVector):
+    """Drop the full-text GIN index PgVector.optimize creates, if an earlier version built it."""
+    with sessionmaker(bind=vector_db.db_engine)() as session, session.begin():
+        disable_statement_timeout(session)
+        session.execute(text(
+            f'DROP INDEX IF EXISTS "{vector_db.schema}"."{vector_db.table_name}_content_gin_index"'
+        ))
+
+
+def rebuild_all():
+    """Drop and rebuild the indexes on the knowledge base and chat memory tables."""
+    from agent_knowledge_base import KnowledgeBaseOperation
+    from memory_store import MemoryStore
+
+    for store in (KnowledgeBaseOperation(), MemoryStore()):
+        store.rebuild_index()
+        print(f"Rebuilt index on {store.table_name}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage pgvector indexes.")
+    parser.add_argument("command", choices=["rebuild"])
+    args = parser.parse_args()
+
+    if args.command == "rebuild":
+        rebuild_all()
@@ -0,0 +1,144 @@
+# vector_utils.py
+# -------------------------------------------------------------
+# Helpers shared by the pgvector-backed stores
+# -------------------------------------------------------------
+from hashlib import md5
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy import func
+from sqlalchemy.dialects import postgresql
+
+from agno.knowledge.document import Document
+from agno.utils.log import log_debug
+from agno.vectordb.distance import Distance
+from agno.vectordb.pgvector import PgVector
+
+from embedding_cache import content_hash
+
+# pgvector operator for each distance, for searches written in raw SQL.
+DISTANCE_OPERATORS = {
+    Distance.cosine: "<=>",
+    Distance.l2: "<->",
+    Distance.max_inner_product: "<#>",
+}
+
+
+def embed_documents(vector_db: PgVector, documents: List[Document]):
+    """
+    Fill in embeddings for documents that do not have one yet, in batches
+    when the embedder supports it.
+    Args:
+        vector_db(PgVector): store whose embedder is used.
+        documents(list): documents to embed in place.
+    """
+    pending = [doc for doc in documents if doc.embedding is None]
+    if not pending:
+        return
+
+    embedder = vector_db.embedder
+    if hasattr(embedder, "get_embeddings_and_usage"):
+        embeddings, usage = embedder.get_embeddings_and_usage([doc.content for doc in pending])
+        for doc, embedding, doc_usage in zip(pending, embeddings, usage):
+            doc.embedding = embedding
+            doc.usage = doc_usage
+    else:
+        for doc in pending:
+            doc.embed(embedder=embedder)
+
+
+def record_id(
+    doc: Document,
+    cleaned_content: str,
+    content_hash: str,
+    user_id: Optional[str] = None,
+    scope: Sequence[Optional[str]] = (),
+) -> str:
+    """
+    Row id as PgVector.upsert derives it: md5 of the chunk id (or of the
+    content) and the content hash, folded with the owning user_id.  Rows
+    written by agno and by `bulk_upsert` therefore collide on the same
+    chunk.  Values in `scope` (e.g. session_id) are folded in the same way,
+    so equal text in two scopes is two rows.
+    """
+    base_id = doc.id or md5(cleaned_content.encode()).hexdigest()
+    row_id = md5(f"{base_id}_{content_hash}".encode()).hexdigest()
+    for value in (user_id, *scope):
+        if value is not None:
+            row_id = md5(f"{row_id}_{value}".encode()).hexdigest()
+    return row_id
+
+
+def _record(
+    doc: Document,
+    filters: Optional[Dict[str, Any]],
+    meta_columns: Sequence[str] = (),
+) -> Dict[str, Any]:
+    """Build a row in the layout of agno's PgVector table."""
+    # Same cleaning as PgVector.upsert so rows stay compatible.
+    cleaned_content = doc.content.replace("\x00", "\ufffd")
+    meta_data = doc.meta_data or {}
+    hash_ = content_hash(doc.content)
+    user_id = meta_data.get("user_id") if "user_id" in meta_columns else None
+    scope = [meta_data.get(column) for column in meta_columns if column != "user_id"]
+    record = {
+        "id": record_id(doc, cleaned_content, hash_, user_id=user_id, scope=scope),
+        "name": doc.name,
+        "meta_data": doc.meta_data or {},
+        "filters": filters,
+        "content": cleaned_content,
+        "embedding": doc.embedding,
+        "usage": doc.usage,
+        "content_hash": hash_,
+        "content_id": getattr(doc, "content_id", None),
+    }
+    for column in meta_columns:
+        record[column] = meta_data.get(column)
+    return record
+
+
+def bulk_upsert(
+    vector_db: PgVector,
+    documents: List[Document],
+    batch_size: int = 500,
+    filters: Optional[Dict[str, Any]] = None,
+    meta_columns: Sequence[str] = (),
+) -> int:
+    """
+    Write documents with one multi-row INSERT ... ON CONFLICT per batch,
+    each batch in its own transaction.
+    Args:
+        vector_db(PgVector): target store; its table must already exist.
+        documents(list): documents to write; missing embeddings are computed.
+        batch_size(int): number of rows per statement.
+        filters(dict): optional filters stored with every row.
+        meta_columns(list): extra table columns filled from each document's meta_data.
+    Returns:
+        int: number of rows written.
+    """
+    table = vector_db.table
+    written = 0
+
+    for i in range(0, len(documents), batch_size):
+        batch_docs = documents[i: i + batch_size]
+        embed_documents(vector_db, batch_docs)
+
+        # A statement may not touch the same row twice, so collapse duplicate chunks.
+        records = {}
+        for doc in batch_docs:
+            record = _record(doc, filters, meta_columns)
+            records[record["id"]] = record
+        rows = list(records.values())
+
+        stmt = postgresql.insert(table).values(rows)
+        update = {column: stmt.excluded[column] for column in rows[0] if column != "id"}
+        if "updated_at" in table.c:
+            # Column onupdate defaults do not fire for ON CONFLICT updates.
+            update["updated_at"] = func.now()
+        stmt = stmt.on_conflict_do_update(index_elements=["id"], set_=update)
+        with vector_db.Session() as session, session.begin():
+            session.execute(stmt)
+
+        written += len(rows)
+        log_debug(f"Upserted batch starting at {i}: {len(rows)} rows")
+
+    return written